@@ -11,14 +11,16 @@
 import gym
 import gym_scaling
 
-from baselines import deepq
-from baselines.common import models
-from gym_scaling.envs.scaling_env import INPUTS
 from train_deepq import play
 
 
 def main():
-    env = gym.make('Scaling-v0')
+    # baselines pulls in tensorflow, imported on use like in train_deepq
+    from baselines import deepq
+    from baselines.common import models
+
+    # play sine curve
+    env = gym.make('ScalingSineCurve-v0')
     act = deepq.learn(
         env,
         network=models.mlp(num_layers=1, num_hidden=20),
@@ -26,10 +28,6 @@ def main():
         load_path='models/scaling_model.pkl'
     )
 
-    # play sine curve
-    env.change_rate = 1
-    env.scaling_env_options['input'] = INPUTS['SINE_CURVE']
-
     play(act, env, 1e6)
 
     env.close()
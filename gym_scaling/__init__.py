@@ -8,9 +8,54 @@
 # OF ANY KIND, either express or implied. See the License for the specific language
 # governing permissions and limitations under the License.
 
+import functools
+
 from gym.envs.registration import register
 
+# registered variants of ScalingEnv, inputs are INPUTS names
+SCALING_ENVS = {
+    'Scaling-v0': {},
+    'ScalingRandom-v0': {'input': 'RANDOM', 'change_rate': 100},
+    'ScalingSineCurve-v0': {'input': 'SINE_CURVE', 'change_rate': 1},
+    'ScalingDiurnal-v0': {'input': 'DIURNAL', 'change_rate': 1},
+    'ScalingWeekly-v0': {'input': 'WEEKLY', 'change_rate': 1},
+    'ScalingBursts-v0': {'input': 'BURSTS', 'change_rate': 1},
+    'ScalingPoisson-v0': {'input': 'POISSON', 'change_rate': 1},
+    'ScalingTrend-v0': {'input': 'TREND', 'change_rate': 1},
+    'ScalingProduction-v0': {'input': 'PRODUCTION_DATA', 'change_rate': 1},
+    'ScalingLifecycle-v0': {'input': 'DIURNAL', 'change_rate': 1, 'boot_time': (120, 480), 'drain_time': (30, 300)},
+}
+
+for env_id, options in SCALING_ENVS.items():
+    register(
+        id=env_id,
+        entry_point='gym_scaling.envs:ScalingEnv',
+        kwargs={'scaling_env_options': options} if options else {},
+    )
+
 register(
-    id='Scaling-v0',
-    entry_point='gym_scaling.envs:ScalingEnv',
+    id='ScalingCluster-v0',
+    entry_point='gym_scaling.envs:ScalingClusterEnv',
 )
+
+
+def make_vec(env_id, num_envs, backend='numpy', scaling_env_options=None, seed=None, **kwargs):
+    """Create `num_envs` copies of a registered ScalingEnv variant as one vector environment.
+
+    The options of the variant, updated with `scaling_env_options`, are validated and derived once
+    and shared by all copies. The 'numpy' backend steps them in a ScalingVecEnv, the 'process'
+    backend in the worker processes of a ScalingSubprocVecEnv, which takes the other arguments.
+    """
+    from gym_scaling.envs import ScalingConfig, ScalingEnv, ScalingSubprocVecEnv, ScalingVecEnv
+
+    assert backend in ('numpy', 'process')
+    assert env_id in SCALING_ENVS, "%s is not a registered ScalingEnv variant" % env_id
+    config = ScalingConfig({**SCALING_ENVS[env_id], **(scaling_env_options or {})})
+    if backend == 'numpy':
+        assert not kwargs, "the numpy backend takes no %s" % ', '.join(sorted(kwargs))
+        env = ScalingVecEnv(num_envs, scaling_env_options=config)
+    else:
+        env = ScalingSubprocVecEnv([functools.partial(ScalingEnv, scaling_env_options=config)] * num_envs, **kwargs)
+    if seed is not None:
+        env.seed(seed)
+    return env
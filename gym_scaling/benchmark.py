@@ -0,0 +1,193 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+"""Throughput and latency benchmark of ScalingEnv.
+
+Runs every combination of fleet size, history length and input, and writes the results to a JSON
+file so runs of different versions can be compared:
+
+    python -m gym_scaling.benchmark --max-instances 100 10000 --size 300 8640 --output bench.json
+
+With `--startup` it measures instead how long fresh interpreters take to import gym and the package,
+construct an environment and take the first reset and step:
+
+    python -m gym_scaling.benchmark --startup --runs 20 --output startup.json
+"""
+
+import argparse
+import itertools
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy
+
+from gym_scaling.envs.scaling_env import INPUTS, ScalingEnv
+from gym_scaling.envs.traces import TraceReplay
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+STARTUP_PHASES = ('interpreter', 'import_gym', 'import_gym_scaling', 'import_envs', 'construct', 'reset',
+                  'first_step')
+
+# run in a fresh interpreter, prints the time of every phase after the interpreter started
+STARTUP_SCRIPT = """
+import time
+start = time.perf_counter()
+times = []
+import gym
+times.append(time.perf_counter())
+import gym_scaling
+times.append(time.perf_counter())
+from gym_scaling.envs import ScalingEnv
+times.append(time.perf_counter())
+env = ScalingEnv()
+times.append(time.perf_counter())
+env.reset()
+times.append(time.perf_counter())
+env.step(0)
+times.append(time.perf_counter())
+print(' '.join(repr(end - begin) for begin, end in zip([start] + times, times)))
+"""
+
+
+def benchmark_env(scaling_env_options, steps=20000, resets=200, seed=0):
+    """Measure one configuration, returns a dict of timings in seconds and sizes in bytes."""
+    tracemalloc.start()
+    env = ScalingEnv(scaling_env_options=scaling_env_options)
+    env.seed(seed)
+    env.reset()
+    env_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    reset_times = numpy.empty(resets)
+    for i in range(resets):
+        start = time.perf_counter()
+        env.reset()
+        reset_times[i] = time.perf_counter() - start
+
+    actions = numpy.random.RandomState(seed).randint(env.num_actions, size=steps).tolist()
+    step_times = numpy.empty(steps)
+    env.reset()
+    episodes = 1
+    started = time.perf_counter()
+    for i, action in enumerate(actions):
+        start = time.perf_counter()
+        _, _, done, _ = env.step(action)
+        step_times[i] = time.perf_counter() - start
+        if done:
+            env.reset()
+            episodes += 1
+    elapsed = time.perf_counter() - started
+    env.close()
+
+    return {
+        'steps_per_second': steps / elapsed,
+        'step_latency': dict(zip(('p%g' % p for p in PERCENTILES), numpy.percentile(step_times, PERCENTILES))),
+        'step_latency_mean': step_times.mean(),
+        'reset_mean': reset_times.mean(),
+        'reset_p99': numpy.percentile(reset_times, 99),
+        'env_bytes': env_bytes,
+        'episodes': episodes,
+    }
+
+
+def benchmark_startup(runs=20):
+    """Median seconds of every startup phase over `runs` fresh interpreters.
+
+    'interpreter' is the time until the script starts, the wall time of the process minus the
+    phases it measured itself.
+    """
+    phases = numpy.empty((runs, len(STARTUP_PHASES)))
+    for i in range(runs):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, '-W', 'ignore', '-c', STARTUP_SCRIPT], check=True,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True).stdout
+        elapsed = time.perf_counter() - start
+        phases[i, 1:] = [float(value) for value in output.split()]
+        phases[i, 0] = elapsed - phases[i, 1:].sum()
+    medians = numpy.median(phases, axis=0)
+    result = dict(zip(STARTUP_PHASES, medians))
+    result['total'] = numpy.median(phases.sum(axis=1))
+    for phase, seconds in result.items():
+        print("%-20s %8.1fms" % (phase, seconds * 1e3))
+    return result
+
+
+def run(max_instances, sizes, inputs, steps, resets, seed):
+    results = []
+    for fleet, size, name in itertools.product(max_instances, sizes, inputs):
+        options = {
+            'max_instances': float(fleet),
+            'size': (size, 250),
+            'input': inputs[name],
+        }
+        result = benchmark_env(options, steps=steps, resets=resets, seed=seed)
+        result.update({'max_instances': fleet, 'size': size, 'input': name})
+        results.append(result)
+        print("max_instances=%-6d size=%-5d input=%-12s %9.0f steps/s  p50 %6.1fus  p99 %6.1fus  reset %7.1fus" % (
+            fleet, size, name, result['steps_per_second'], result['step_latency']['p50'] * 1e6,
+            result['step_latency']['p99'] * 1e6, result['reset_mean'] * 1e6))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ScalingEnv step and reset performance.")
+    parser.add_argument('--max-instances', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--size', type=int, nargs='+', default=[300, 2016],
+                        help="history lengths, 2016 steps are one week")
+    parser.add_argument('--inputs', nargs='+', default=['RANDOM', 'SINE_CURVE'],
+                        choices=sorted(name for name in INPUTS if name != 'PRODUCTION_DATA'))
+    parser.add_argument('--trace', help="compiled trace or export to benchmark trace replay with")
+    parser.add_argument('--steps', type=int, default=20000)
+    parser.add_argument('--resets', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="JSON file to write the results to")
+    parser.add_argument('--startup', action='store_true',
+                        help="measure import and first step times of fresh interpreters instead")
+    parser.add_argument('--runs', type=int, default=20, help="interpreters started with --startup")
+    args = parser.parse_args()
+
+    if args.startup:
+        results = benchmark_startup(args.runs)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump({
+                    'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                    'python': platform.python_version(),
+                    'numpy': numpy.__version__,
+                    'machine': platform.machine(),
+                    'runs': args.runs,
+                    'startup': results,
+                }, f, indent=2)
+        return
+
+    inputs = {name: INPUTS[name] for name in args.inputs}
+    if args.trace:
+        inputs['TRACE'] = {'generator': TraceReplay, 'options': {'path': args.trace}}
+
+    results = run(args.max_instances, args.size, inputs, args.steps, args.resets, args.seed)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'python': platform.python_version(),
+                'numpy': numpy.__version__,
+                'machine': platform.machine(),
+                'steps': args.steps,
+                'results': results,
+            }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
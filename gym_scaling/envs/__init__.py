@@ -8,4 +8,36 @@
 # OF ANY KIND, either express or implied. See the License for the specific language
 # governing permissions and limitations under the License.
 
-from gym_scaling.envs.scaling_env import ScalingEnv
+import importlib
+import sys
+
+from gym_scaling.envs.scaling_env import ScalingConfig, ScalingEnv
+
+# the other submodules are imported on first access, eagerly before Python 3.7 which has no
+# module __getattr__
+_LAZY_EXPORTS = {
+    'ScalingVecEnv': 'vec_env',
+    'ScalingSubprocVecEnv': 'subproc_vec_env',
+    'ScalingClusterEnv': 'cluster_env',
+    'TrajectoryRecorder': 'recording',
+    'load_trajectory': 'recording',
+}
+
+__all__ = ['ScalingConfig', 'ScalingEnv'] + list(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _LAZY_EXPORTS:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    value = getattr(importlib.import_module('.' + _LAZY_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
+
+
+if sys.version_info < (3, 7):
+    for _name in _LAZY_EXPORTS:
+        __getattr__(_name)
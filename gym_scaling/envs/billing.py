@@ -0,0 +1,114 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+"""Instance billing per started hour or per second.
+
+Per-hour billing charges an instance the hourly price for every hour it has started, the first one
+at launch. Per-second billing charges the seconds it ran, but at least `minimum` seconds, which are
+charged at launch. An instance launched at step s runs from step s to the step it is terminated at,
+so step t charges it for the time between steps t - 1 and t.
+"""
+
+import collections
+import itertools
+import math
+
+BILLING_PERIODS = ('hour', 'second')
+
+BillingPlan = collections.namedtuple(
+    'BillingPlan', ('steps_per_period', 'minimum_steps', 'launch_factor', 'step_factor', 'partial_factor'))
+
+
+def billing_plan(step_size_in_seconds, period='hour', minimum=60):
+    """Charges as multiples of the hourly price, at launch, per step and when the minimum has passed.
+
+    Instances are charged `step_factor` at the steps congruent, modulo `steps_per_period`, to the
+    step `minimum_steps` after their launch, and `partial_factor` at that step itself.
+    """
+    assert period in BILLING_PERIODS
+    if period == 'hour':
+        # a full hour per started hour, the first at launch
+        assert 3600 % step_size_in_seconds == 0, "per-hour billing needs steps dividing an hour"
+        return BillingPlan(3600 // step_size_in_seconds, 1, 1.0, 1.0, 0.0)
+    # the minimum at launch, nothing until it has passed, then the rest of that step and every step after
+    minimum_steps = max(1, math.ceil(minimum / step_size_in_seconds))
+    return BillingPlan(1, minimum_steps, minimum / 3600, step_size_in_seconds / 3600,
+                       (minimum_steps * step_size_in_seconds - minimum) / 3600)
+
+
+class Billing:
+    """Charges of a fleet, updated from launch and termination events only.
+
+    Instances pay the same amount whenever their age reaches the same point of their billing period,
+    so their hourly prices are summed per launch step modulo the period: charging a step is O(1)
+    regardless of the number of instances. Instances within their minimum charge are kept apart
+    until it has passed.
+    """
+
+    def __init__(self, step_size_in_seconds=300, period='hour', minimum=60):
+        (self.steps_per_period, self.minimum_steps, self.launch_factor, self.step_factor,
+         self.partial_factor) = billing_plan(step_size_in_seconds, period, minimum)
+        self.clear()
+
+    def clear(self):
+        # summed hourly prices per residue of the step instances leave their minimum charge at
+        self._rate = [0.0] * self.steps_per_period
+        # launch step -> summed hourly prices of the instances still within their minimum charge
+        self._young = {}
+
+    def launch(self, step, count, cost_per_hour):
+        """Register launched instances, returns the charge at launch."""
+        rate = cost_per_hour * count
+        self._young[step] = self._young.get(step, 0.0) + rate
+        return rate * self.launch_factor
+
+    def terminate(self, launch_step, count, cost_per_hour):
+        """Stop charging instances launched at `launch_step`."""
+        rate = cost_per_hour * count
+        if launch_step in self._young:
+            self._young[launch_step] -= rate
+        else:
+            self._rate[(launch_step + self.minimum_steps) % self.steps_per_period] -= rate
+
+    def cost(self, step):
+        """The charges of step `step`."""
+        charge = self._rate[step % self.steps_per_period] * self.step_factor
+        while self._young:
+            launch_step = next(iter(self._young))
+            if step - launch_step < self.minimum_steps:
+                break
+            rate = self._young.pop(launch_step)
+            charge += rate * self.partial_factor
+            self._rate[(launch_step + self.minimum_steps) % self.steps_per_period] += rate
+        return charge
+
+    def save_state(self, writer):
+        writer.add(len(self._young), *self._rate)
+        writer.add(*itertools.chain.from_iterable(self._young.items()))
+
+    def load_state(self, reader):
+        young = reader.int()
+        self._rate = reader.values(self.steps_per_period)
+        # in launch order, cost() takes the oldest first
+        values = reader.values(2 * young)
+        self._young = {int(launch_step): rate for launch_step, rate in zip(values[0::2], values[1::2])}
+
+    def cost_between(self, first_step, last_step):
+        """Sum of cost(step) for first_step < step <= last_step, without launches in between."""
+        total = 0.0
+        step = first_step + 1
+        while self._young and step <= last_step:
+            total += self.cost(step)
+            step += 1
+        for residue, rate in enumerate(self._rate):
+            if rate:
+                count = (last_step - residue) // self.steps_per_period - (step - 1 - residue) // self.steps_per_period
+                total += rate * count * self.step_factor
+        return total
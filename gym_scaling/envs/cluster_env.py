@@ -0,0 +1,69 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+import sys
+
+import gym
+import numpy
+from gym import spaces
+
+from .scaling_env import input_spec
+from .vec_env import ScalingVecEnv
+
+
+class ScalingClusterEnv(ScalingVecEnv, gym.Env):
+    """Services with their own influx, queue and fleet sharing one instance budget.
+
+    The services are kept in arrays like the copies of ScalingVecEnv, so stepping hundreds of them
+    is one vectorized step. Scaling actions are pending for one step like in ScalingEnv. When they
+    are applied, scale-ins free budget first and scale-outs beyond `instance_budget` are denied,
+    longest queues first served, and penalized like scaling out of bounds. Episodes start with the
+    instances of ScalingEnv per service, fewer when they exceed the budget. The reward is the sum
+    over the services and the episode ends when any queue overflows.
+    """
+    metadata = {'render.modes': []}
+
+    def __init__(self, num_services=10, instance_budget=None, service_inputs=None, scaling_env_options=None):
+        super().__init__(num_services, scaling_env_options)
+        self.num_services = num_services
+        self.instance_budget = instance_budget
+        if instance_budget is not None:
+            # episodes start within the budget, split evenly between the services
+            assert instance_budget >= num_services * self.min_instances, \
+                "an instance budget of %d is below min_instances for %d services" % (instance_budget, num_services)
+            self.initial_instances = min(self.initial_instances, int(instance_budget // num_services))
+        if service_inputs is not None:
+            assert len(service_inputs) == num_services
+            self.inputs = [input_spec(spec) for spec in service_inputs]
+        self.action_space = spaces.MultiDiscrete([self.num_actions] * num_services)
+        self.observation_space = spaces.Box(low=0.0, high=sys.float_info.max,
+                                            shape=(num_services, self.observation_size))
+
+    def step(self, action):
+        self.step_async(action)
+        observation, reward, done = self._step()
+        return observation, float(reward.sum()), bool(done.any()), {
+            'rewards': reward,
+            'dones': done,
+            'instances': int(self.fleet.size.sum()),
+            'total_cost': float(self.total_cost.sum()),
+        }
+
+    def _scaling_allowed(self, action):
+        allowed = super()._scaling_allowed(action)
+        if self.instance_budget is None:
+            return allowed
+        released = numpy.where(allowed & (action < 0), action, 0).sum()
+        requested = numpy.where(allowed & (action > 0), action, 0)
+        order = numpy.argsort(-self.queue_size, kind='stable')
+        instances = self.fleet.size.sum() + released + numpy.cumsum(requested[order])
+        within_budget = numpy.empty(self.num_services, dtype=bool)
+        within_budget[order] = instances <= self.instance_budget
+        return allowed & (within_budget | (requested == 0))
@@ -0,0 +1,350 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+import collections
+import heapq
+import itertools
+
+import numpy
+
+from .billing import Billing, billing_plan
+
+
+class Fleet:
+    """Instances grouped into launch cohorts, oldest first.
+
+    Cost is accounted by a Billing from launches and terminations, so a step costs O(1) regardless
+    of the fleet size and scaling costs O(cohorts touched). Launched instances boot before they serve and
+    terminated ones drain before they stop being billed; both finish through events scheduled per
+    step, so advancing a step only touches the events due at that step.
+    """
+
+    def __init__(self, billing=None):
+        # booting and warm instances, `warm` of them serve
+        self.size = 0
+        self.warm = 0
+        self.draining = 0
+        self.cohorts = collections.deque()
+        self.billing = billing if billing is not None else Billing()
+        # step -> instances getting warm, step -> (launch step, count, hourly cost) of drained instances
+        self._ready = {}
+        self._drained = {}
+        self._event_steps = []
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def booting(self):
+        return self.size - self.warm
+
+    def launch(self, step, count, cost_per_hour, boot_steps=0):
+        """Launch `count` instances, warm after `boot_steps`, a number or one per instance.
+
+        The capacity of a step covers the time since the previous step, so instances booting for a
+        number of steps serve from the step after they have booted. Returns the charge at launch.
+        """
+        if count <= 0:
+            return 0.0
+        self.size += count
+        charge = self.billing.launch(step, count, cost_per_hour)
+        if numpy.ndim(boot_steps) == 0:
+            boot_steps = int(boot_steps)
+            self._launch_cohort(step, count, cost_per_hour, step + boot_steps + (boot_steps > 0))
+        else:
+            boot_steps = numpy.asarray(boot_steps, dtype=numpy.int64)
+            ready_steps, counts = numpy.unique(boot_steps + (boot_steps > 0), return_counts=True)
+            for ready_step, ready_count in zip((step + ready_steps).tolist(), counts.tolist()):
+                self._launch_cohort(step, ready_count, cost_per_hour, ready_step)
+        return charge
+
+    def terminate(self, count, step=0, drain_steps=0):
+        """Terminate the oldest `count` instances, billed for `drain_steps` more, a number or one per instance."""
+        per_instance = numpy.ndim(drain_steps) > 0
+        if per_instance:
+            drain_steps = numpy.asarray(drain_steps, dtype=numpy.int64)
+        terminated = 0
+        while count > 0 and self.cohorts:
+            cohort = self.cohorts[0]
+            launch_step, available, cost_per_hour, ready_step = cohort
+            taken = min(count, available)
+
+            self.size -= taken
+            if ready_step > step:
+                # still booting, it will not get warm anymore
+                self._ready[ready_step] -= taken
+            else:
+                self.warm -= taken
+            if per_instance:
+                drains, counts = numpy.unique(drain_steps[terminated:terminated + taken], return_counts=True)
+                for drain, drain_count in zip(drains.tolist(), counts.tolist()):
+                    self._drain(step, drain, launch_step, drain_count, cost_per_hour)
+            else:
+                self._drain(step, int(drain_steps), launch_step, taken, cost_per_hour)
+            count -= taken
+            terminated += taken
+            if taken == available:
+                self.cohorts.popleft()
+            else:
+                cohort[1] -= taken
+
+    def advance(self, step):
+        """Apply the events due up to `step`, instances getting warm and drained ones leaving."""
+        while self._event_steps and self._event_steps[0] <= step:
+            due = heapq.heappop(self._event_steps)
+            self.warm += self._ready.pop(due, 0)
+            for launch_step, count, cost_per_hour in self._drained.pop(due, ()):
+                self.draining -= count
+                self.billing.terminate(launch_step, count, cost_per_hour)
+
+    def next_event(self):
+        """The step of the next scheduled event, None without any."""
+        return self._event_steps[0] if self._event_steps else None
+
+    def save_state(self, writer):
+        drained = [(step,) + event for step, events in self._drained.items() for event in events]
+        writer.add(self.size, self.warm, self.draining, len(self.cohorts), len(self._ready), len(drained))
+        writer.add(*itertools.chain.from_iterable(self.cohorts))
+        writer.add(*itertools.chain.from_iterable(self._ready.items()))
+        writer.add(*itertools.chain.from_iterable(drained))
+        self.billing.save_state(writer)
+
+    def load_state(self, reader):
+        self.size, self.warm, self.draining, cohorts, ready, drained = map(int, reader.values(6))
+        values = reader.values(4 * cohorts)
+        self.cohorts = collections.deque(
+            [int(launch_step), int(count), cost_per_hour, int(ready_step)]
+            for launch_step, count, cost_per_hour, ready_step in zip(values[0::4], values[1::4], values[2::4], values[3::4]))
+        values = reader.values(2 * ready)
+        self._ready = {int(step): int(count) for step, count in zip(values[0::2], values[1::2])}
+        values = reader.values(4 * drained)
+        self._drained = {}
+        for step, launch_step, count, cost_per_hour in zip(values[0::4], values[1::4], values[2::4], values[3::4]):
+            self._drained.setdefault(int(step), []).append((int(launch_step), int(count), cost_per_hour))
+        # every step with an event is scheduled once, a sorted list is a heap
+        self._event_steps = sorted(set(self._ready) | set(self._drained))
+        self.billing.load_state(reader)
+
+    def _launch_cohort(self, step, count, cost_per_hour, ready_step):
+        self.cohorts.append([step, count, cost_per_hour, ready_step])
+        if ready_step <= step:
+            self.warm += count
+        else:
+            self._schedule(ready_step)
+            self._ready[ready_step] = self._ready.get(ready_step, 0) + count
+
+    def _drain(self, step, drain_steps, launch_step, count, cost_per_hour):
+        if drain_steps <= 0:
+            self.billing.terminate(launch_step, count, cost_per_hour)
+            return
+        self.draining += count
+        self._schedule(step + drain_steps)
+        self._drained.setdefault(step + drain_steps, []).append((launch_step, count, cost_per_hour))
+
+    def _schedule(self, step):
+        if step not in self._ready and step not in self._drained:
+            heapq.heappush(self._event_steps, step)
+
+    def cost(self, step):
+        return self.billing.cost(step)
+
+    def cost_between(self, first_step, last_step):
+        """Sum of cost(step) for first_step < step <= last_step, in O(1)."""
+        return self.billing.cost_between(first_step, last_step)
+
+
+class BatchedFleet:
+    """Fleets of N independent environments stored as arrays.
+
+    Instances are grouped into launch cohorts kept in a per-environment ring buffer, oldest first,
+    so scale-in removes the oldest instances like the scalar environment does. Cost is accounted
+    like Billing does, per launch step modulo the billing period, which makes a step O(1) per
+    environment. Minimum charges have to pass within one step.
+    """
+
+    _STATE = ('size', 'launch_step', 'count', 'cost_per_hour', 'head', 'tail', '_rate', '_fresh', '_fresh_step')
+
+    def __init__(self, num_envs, max_instances, step_size_in_seconds=300, billing='hour', minimum_billing_seconds=60):
+        self.num_envs = num_envs
+        self.max_cohorts = int(max_instances) + 1
+        self._rows = numpy.arange(num_envs)
+
+        self.size = numpy.zeros(num_envs, dtype=numpy.int64)
+        self.launch_step = numpy.zeros((num_envs, self.max_cohorts), dtype=numpy.int64)
+        self.count = numpy.zeros((num_envs, self.max_cohorts), dtype=numpy.int64)
+        self.cost_per_hour = numpy.zeros((num_envs, self.max_cohorts))
+        self.head = numpy.zeros(num_envs, dtype=numpy.int64)
+        self.tail = numpy.zeros(num_envs, dtype=numpy.int64)
+
+        self.plan = billing_plan(step_size_in_seconds, billing, minimum_billing_seconds)
+        assert self.plan.minimum_steps == 1, "the minimum charge has to be at most one step"
+        # summed hourly prices per residue of the step after the launch, and of the instances launched
+        # at `_fresh_step` that are charged their minimum, -1 without any
+        self._rate = numpy.zeros((num_envs, self.plan.steps_per_period))
+        self._fresh = numpy.zeros(num_envs)
+        self._fresh_step = numpy.full(num_envs, -1, dtype=numpy.int64)
+
+    def clear(self, mask):
+        self.size[mask] = 0
+        self.count[mask] = 0
+        self.head[mask] = 0
+        self.tail[mask] = 0
+        self._rate[mask] = 0.0
+        self._fresh[mask] = 0.0
+        self._fresh_step[mask] = -1
+
+    def launch(self, mask, step, count, cost_per_hour):
+        """Launch instances in the masked environments, returns the charges at launch."""
+        charges = numpy.zeros(self.num_envs)
+        mask = mask & (numpy.broadcast_to(count, self.num_envs) > 0)
+        rows = self._rows[mask]
+        if len(rows) == 0:
+            return charges
+        step = numpy.broadcast_to(step, self.num_envs)[rows]
+        count = numpy.broadcast_to(count, self.num_envs)[rows]
+        cost_per_hour = numpy.broadcast_to(cost_per_hour, self.num_envs)[rows]
+
+        slot = self.tail[rows] % self.max_cohorts
+        self.launch_step[rows, slot] = step
+        self.count[rows, slot] = count
+        self.cost_per_hour[rows, slot] = cost_per_hour
+        self.tail[rows] += 1
+        self.size[rows] += count
+
+        self._fresh[rows] += cost_per_hour * count
+        self._fresh_step[rows] = step
+        charges[rows] = cost_per_hour * count * self.plan.launch_factor
+        return charges
+
+    def terminate(self, mask, count):
+        rows = self._rows[mask]
+        remaining = numpy.broadcast_to(count, self.num_envs)[rows].copy()
+        while len(rows):
+            slot = self.head[rows] % self.max_cohorts
+            taken = numpy.minimum(remaining, self.count[rows, slot])
+            step = self.launch_step[rows, slot]
+            cost = self.cost_per_hour[rows, slot] * taken
+
+            fresh = step == self._fresh_step[rows]
+            self._fresh[rows[fresh]] -= cost[fresh]
+            numpy.subtract.at(self._rate, (rows[~fresh], (step[~fresh] + 1) % self.plan.steps_per_period),
+                              cost[~fresh])
+            self.count[rows, slot] -= taken
+            self.size[rows] -= taken
+            self.head[rows] += self.count[rows, slot] == 0
+
+            remaining -= taken
+            pending = (remaining > 0) & (self.size[rows] > 0)
+            rows = rows[pending]
+            remaining = remaining[pending]
+
+    def save_state(self, writer):
+        for name in self._STATE:
+            writer.add_array(getattr(self, name))
+
+    def load_state(self, reader):
+        for name in self._STATE:
+            values = getattr(self, name)
+            values[...] = reader.array(values.size).reshape(values.shape)
+
+    def cost(self, step):
+        """The charges of step `step` per environment."""
+        residue = step % self.plan.steps_per_period
+        charges = self._rate[self._rows, residue] * self.plan.step_factor + self._fresh * self.plan.partial_factor
+        # instances launched before leave their minimum charge
+        self._rate[self._rows, (self._fresh_step + 1) % self.plan.steps_per_period] += self._fresh
+        self._fresh[:] = 0.0
+        self._fresh_step[:] = -1
+        return charges
+
+
+class PooledFleet:
+    """Pools of different instance types and markets, one BatchedFleet row per pool.
+
+    Capacity and cost are aggregated over the pools with array operations. Prices are replayed from
+    hourly traces and every charge is billed at the price of its hour: the pool rows are billed at a
+    price of 1, so they count the instances due per billing residue, and the counts are multiplied by
+    the current prices. Every step each instance of a spot pool is interrupted with the interruption
+    probability of its pool.
+    """
+
+    booting = 0
+    draining = 0
+
+    def __init__(self, capacity_per_instance, price_traces, interruption_probability, max_instances, rng,
+                 step_size_in_seconds=300, billing='hour', minimum_billing_seconds=60):
+        self.num_pools = len(capacity_per_instance)
+        self.capacity_per_instance = numpy.asarray(capacity_per_instance, dtype=numpy.float64)
+        self.interruption_probability = numpy.asarray(interruption_probability, dtype=numpy.float64)
+        self.rng = rng
+        self.step_size_in_seconds = step_size_in_seconds
+        self.pools = BatchedFleet(self.num_pools, max_instances, step_size_in_seconds, billing, minimum_billing_seconds)
+        self._rows = numpy.arange(self.num_pools)
+
+        # traces padded to the longest one, each replayed with its own length
+        self._trace_length = numpy.array([len(trace) for trace in price_traces])
+        self._prices = numpy.zeros((self.num_pools, self._trace_length.max()))
+        for pool, trace in enumerate(price_traces):
+            self._prices[pool, :len(trace)] = trace
+
+        self.interrupted = 0
+        self._update()
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def sizes(self):
+        return self.pools.size
+
+    def prices(self, step):
+        """The hourly price per instance of every pool at `step`."""
+        hour = step * self.step_size_in_seconds // 3600
+        return self._prices[self._rows, hour % self._trace_length]
+
+    def launch(self, step, counts):
+        """Launch `counts` instances per pool, returns the charge at launch."""
+        counts = numpy.asarray(counts, dtype=numpy.int64)
+        charges = self.pools.launch(counts > 0, step, counts, 1.0)
+        self._update()
+        return float(charges @ self.prices(step))
+
+    def terminate(self, counts):
+        counts = numpy.minimum(counts, self.pools.size)
+        self.pools.terminate(counts > 0, counts)
+        self._update()
+
+    def advance(self, step):
+        if not self.size or not self.interruption_probability.any():
+            self.interrupted = 0
+            return
+        interrupted = self.rng.binomial(self.pools.size, self.interruption_probability)
+        self.interrupted = int(interrupted.sum())
+        if self.interrupted:
+            self.terminate(interrupted)
+
+    def next_event(self):
+        return None
+
+    def save_state(self, writer):
+        writer.add(self.interrupted)
+        self.pools.save_state(writer)
+
+    def load_state(self, reader):
+        self.interrupted = reader.int()
+        self.pools.load_state(reader)
+        self._update()
+
+    def cost(self, step):
+        return float(self.pools.cost(step) @ self.prices(step))
+
+    def _update(self):
+        self.size = self.warm = int(self.pools.size.sum())
+        self.capacity = float(self.pools.size @ self.capacity_per_instance)
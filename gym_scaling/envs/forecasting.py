@@ -0,0 +1,206 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+"""Online influx forecasts for the observation.
+
+Every forecaster is updated with the influx of each step, the same value appended to the influx
+history, in constant time without refitting, and predicts the influx for a number of horizons in
+steps ahead at once. Forecasts are clipped at 0 like the influx.
+"""
+
+import math
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+class EWMA:
+    """Exponentially weighted moving average, the same forecast for every horizon."""
+
+    def __init__(self, step_size_in_seconds, alpha=0.3):
+        assert 0 < alpha <= 1
+        self.alpha = alpha
+        self.level = 0.0
+
+    def reset(self, value):
+        self.level = value
+
+    def update(self, value):
+        self.level += self.alpha * (value - self.level)
+
+    def forecast(self, horizons):
+        # a weighted average of influx values, never negative
+        return [self.level] * len(horizons)
+
+    def save_state(self, writer):
+        writer.add(self.level)
+
+    def load_state(self, reader):
+        self.level = reader.float()
+
+
+class HoltWinters:
+    """Additive Holt-Winters with a level, a trend and one seasonal component per step of a season.
+
+    The season defaults to one day of steps. Seasonal components start at 0 and are learnt during
+    the first seasons.
+    """
+
+    def __init__(self, step_size_in_seconds, alpha=0.1, beta=0.01, gamma=0.3, season_length=None):
+        assert 0 < alpha <= 1 and 0 <= beta <= 1 and 0 <= gamma <= 1
+        self.alpha, self.beta, self.gamma = alpha, beta, gamma
+        self.season_length = season_length or max(1, SECONDS_PER_DAY // step_size_in_seconds)
+        self.seasonal = [0.0] * self.season_length
+        self.level = 0.0
+        self.trend = 0.0
+        self.position = 0
+
+    def reset(self, value):
+        self.seasonal = [0.0] * self.season_length
+        self.level = value
+        self.trend = 0.0
+        self.position = 0
+
+    def update(self, value):
+        seasonal = self.seasonal[self.position]
+        level = self.alpha * (value - seasonal) + (1 - self.alpha) * (self.level + self.trend)
+        self.trend = self.beta * (level - self.level) + (1 - self.beta) * self.trend
+        self.seasonal[self.position] = self.gamma * (value - level) + (1 - self.gamma) * seasonal
+        self.level = level
+        self.position = (self.position + 1) % self.season_length
+
+    def forecast(self, horizons):
+        # the components of the last steps at the same phase of the season
+        level, trend, seasonal, position, season_length = (
+            self.level, self.trend, self.seasonal, self.position - 1, self.season_length)
+        return [max(level + horizon * trend + seasonal[(position + horizon) % season_length], 0.0)
+                for horizon in horizons]
+
+    def save_state(self, writer):
+        writer.add(self.level, self.trend, self.position)
+        writer.add_array(self.seasonal)
+
+    def load_state(self, reader):
+        self.level, self.trend, position = reader.values(3)
+        self.position = int(position)
+        self.seasonal = reader.values(self.season_length)
+
+
+class LinearTrend:
+    """Least squares line through the last `window` values, extrapolated.
+
+    The sums of the values and of the values times their position in the window are updated as
+    values enter and leave the window, and recomputed once per round to drop rounding errors.
+    """
+
+    def __init__(self, step_size_in_seconds, window=12):
+        assert window >= 2
+        self.window = window
+        self.reset(0.0)
+
+    def reset(self, value):
+        self.values = [0.0] * self.window
+        self.count = 0
+        self.position = 0
+        self.sum = 0.0
+        self.weighted_sum = 0.0
+        self.last = value
+
+    def update(self, value):
+        if self.count < self.window:
+            self.weighted_sum += self.count * value
+            self.sum += value
+            self.count += 1
+        else:
+            oldest = self.values[self.position]
+            self.weighted_sum += (self.window - 1) * value - (self.sum - oldest)
+            self.sum += value - oldest
+        self.values[self.position] = value
+        self.position = (self.position + 1) % self.window
+        self.last = value
+        if self.position == 0:
+            self.__recompute()
+
+    def forecast(self, horizons):
+        n = self.count
+        if n < 2:
+            return [self.last] * len(horizons)
+        # positions 0 .. n - 1, the newest at n - 1
+        sum_x = n * (n - 1) / 2
+        sum_xx = (n - 1) * n * (2 * n - 1) / 6
+        slope = (n * self.weighted_sum - sum_x * self.sum) / (n * sum_xx - sum_x * sum_x)
+        newest = (self.sum - slope * sum_x) / n + slope * (n - 1)
+        return [max(newest + slope * horizon, 0.0) for horizon in horizons]
+
+    def save_state(self, writer):
+        writer.add(self.count, self.position, self.sum, self.weighted_sum, self.last)
+        writer.add_array(self.values)
+
+    def load_state(self, reader):
+        count, position, self.sum, self.weighted_sum, self.last = reader.values(5)
+        self.count, self.position = int(count), int(position)
+        self.values = reader.values(self.window)
+
+    def __recompute(self):
+        # the window is full and starts at position 0
+        self.sum = math.fsum(self.values)
+        self.weighted_sum = math.fsum(i * value for i, value in enumerate(self.values))
+
+
+FORECASTERS = {
+    'ewma': EWMA,
+    'holt_winters': HoltWinters,
+    'linear_trend': LinearTrend,
+}
+
+
+def forecast_methods(methods):
+    """{name: options} from a sequence of FORECASTERS names or such a dict."""
+    if not isinstance(methods, dict):
+        methods = {name: {} for name in methods}
+    unknown = set(methods) - set(FORECASTERS)
+    assert not unknown, "unknown forecast methods %s, one of %s" % (', '.join(sorted(unknown)),
+                                                                    ', '.join(sorted(FORECASTERS)))
+    return methods
+
+
+class InfluxForecast:
+    """Forecasts of several methods for several horizons, one observation feature each."""
+
+    def __init__(self, methods, horizons, step_size_in_seconds):
+        self.forecasters = [FORECASTERS[name](step_size_in_seconds, **options)
+                            for name, options in forecast_methods(methods).items()]
+        self.horizons = tuple(horizons)
+
+    def reset(self, value):
+        for forecaster in self.forecasters:
+            forecaster.reset(value)
+
+    def update(self, value):
+        for forecaster in self.forecasters:
+            forecaster.update(value)
+
+    def features(self):
+        features = []
+        for forecaster in self.forecasters:
+            features += forecaster.forecast(self.horizons)
+        return tuple(features)
+
+    def save_state(self, writer):
+        for forecaster in self.forecasters:
+            forecaster.save_state(writer)
+
+    def load_state(self, reader):
+        for forecaster in self.forecasters:
+            forecaster.load_state(reader)
+
+
+def forecast_features(methods, horizons):
+    """Observation feature names of the forecasts, in the order of InfluxForecast.features()."""
+    return tuple('forecast_%s_%d' % (name, horizon) for name in forecast_methods(methods) for horizon in horizons)
@@ -0,0 +1,108 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+import numpy
+
+
+class History:
+    """Preallocated ring buffer holding the last `capacity` values of several series.
+
+    Every value is written twice, `capacity` slots apart, so the most recent values of a series
+    are always one contiguous slice and can be returned as a view without copying. Appended values
+    are staged in a list and written to the buffer in blocks, keeping the per-step cost at a list
+    append. The sums of all series are updated with every block, which makes averages O(1).
+    """
+
+    def __init__(self, names, capacity, block_size=256):
+        self.names = tuple(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.capacity = capacity
+        self._pending_size = min(block_size, capacity) * len(self.names)
+        self.buffer = numpy.zeros((len(self.names), 2 * capacity))
+        self.clear()
+
+    def __len__(self):
+        return min(self.capacity, self.length + len(self._pending) // len(self.names))
+
+    def clear(self):
+        self._pending = []
+        self.length = 0
+        self.position = 0
+        self.sums = numpy.zeros(len(self.names))
+
+    def append(self, *values):
+        self._pending.extend(values)
+        if len(self._pending) >= self._pending_size:
+            self.flush()
+
+    def extend(self, values):
+        """Append a (series, n) block, only the last `capacity` columns are kept."""
+        self.flush()
+        self._write(numpy.asarray(values, dtype=numpy.float64))
+
+    def flush(self):
+        if self._pending:
+            values = numpy.fromiter(self._pending, dtype=numpy.float64, count=len(self._pending))
+            values = values.reshape(-1, len(self.names)).T
+            self._pending = []
+            self._write(values)
+
+    def window(self, length):
+        """View of the last `length` values of all series, oldest first, shape (series, length)."""
+        self.flush()
+        end = self.position + self.capacity
+        return self.buffer[:, end - length:end]
+
+    def view(self, name):
+        """View of all values of one series, oldest first."""
+        self.flush()
+        end = self.position + self.capacity
+        return self.buffer[self.index[name], end - self.length:end]
+
+    def mean(self, name):
+        self.flush()
+        return float(self.sums[self.index[name]]) / self.length
+
+    def save_state(self, writer):
+        # both halves of the buffer are equal, one of them is enough
+        self.flush()
+        writer.add(self.length, self.position)
+        writer.add_array(self.sums)
+        writer.add_array(self.buffer[:, :self.capacity])
+
+    def load_state(self, reader):
+        self._pending = []
+        self.length = reader.int()
+        self.position = reader.int()
+        self.sums = reader.array(len(self.names)).copy()
+        values = reader.array(len(self.names) * self.capacity).reshape(len(self.names), self.capacity)
+        self.buffer[:, :self.capacity] = values
+        self.buffer[:, self.capacity:] = values
+
+    def _write(self, values):
+        count = values.shape[1]
+        kept = values[:, max(0, count - self.capacity):]
+        slots = (self.position + count - kept.shape[1] + numpy.arange(kept.shape[1])) % self.capacity
+        wrapped = self.position + count >= self.capacity
+        if not wrapped:
+            # the slots past the free ones hold the oldest values
+            evicted = count - (self.capacity - self.length)
+            if evicted > 0:
+                self.sums -= self.buffer[:, slots[-evicted:]].sum(axis=1)
+            self.sums += kept.sum(axis=1)
+
+        self.buffer[:, slots] = kept
+        self.buffer[:, slots + self.capacity] = kept
+        self.length = min(self.capacity, self.length + count)
+        self.position = (self.position + count) % self.capacity
+        if wrapped:
+            # start over from the buffer once per round, dropping the rounding errors of the sums
+            self.sums = self.buffer[:, self.position + self.capacity - self.length:
+                                    self.position + self.capacity].sum(axis=1)
@@ -0,0 +1,219 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+"""Influx generators.
+
+The influx changes every `change_rate` steps. A generator produces the influx for those steps in
+vectorized chunks from the environment's own `numpy.random.Generator`, so environments seeded alike
+see the same influx and environments seeded differently draw independent streams.
+"""
+
+import math
+
+import numpy
+
+STEPS_PER_DAY = 288  # 5 minute steps
+STEPS_PER_WEEK = 7 * STEPS_PER_DAY
+
+
+class InfluxGenerator:
+    """Base class, subclasses implement `generate(steps)` for an array of step indices.
+
+    Chunks start small and double up to `chunk_size`, so short episodes do not pay for thousands
+    of values they never use.
+    """
+
+    first_chunk_size = 16
+
+    def __init__(self, max_influx, offset, change_rate, rng, chunk_size=4096, poisson=False):
+        self.max_influx = max_influx
+        self.offset = offset
+        self.change_rate = change_rate
+        self.rng = rng
+        self.chunk_size = chunk_size
+        self.poisson = poisson
+        self.reset()
+
+    def reset(self):
+        self._buffer = numpy.empty(0)
+        self._position = 0
+        self._generated = 0
+        self._next_chunk_size = min(self.first_chunk_size, self.chunk_size)
+
+    def next(self):
+        if self._position == len(self._buffer):
+            self._refill()
+        self._position += 1
+        return float(self._buffer[self._position - 1])
+
+    def next_block(self, limit):
+        """Return up to `limit` next values, at most the rest of the current chunk.
+
+        Never generates more values than calling next() the same number of times would, so the
+        random stream stays the same however the values are consumed.
+        """
+        if self._position == len(self._buffer):
+            self._refill()
+        block = self._buffer[self._position:self._position + limit]
+        self._position += len(block)
+        return block
+
+    def generate(self, steps):
+        raise NotImplementedError
+
+    def save_state(self, writer):
+        # only the values not consumed yet, the buffer restarts with them
+        writer.add_sized(self._buffer[self._position:])
+        writer.add(self._generated, self._next_chunk_size)
+
+    def load_state(self, reader):
+        self._buffer = reader.sized().copy()
+        self._position = 0
+        self._generated = reader.int()
+        self._next_chunk_size = reader.int()
+
+    def _refill(self):
+        steps = (self._generated + numpy.arange(self._next_chunk_size)) * self.change_rate
+        self._buffer = numpy.asarray(self.generate(steps), dtype=numpy.float64)
+        self._position = 0
+        self._generated += self._next_chunk_size
+        self._next_chunk_size = min(self._next_chunk_size * 2, self.chunk_size)
+
+    def _arrivals(self, mean):
+        # either the expected number of messages or a Poisson sample around it
+        if self.poisson:
+            return self.rng.poisson(numpy.maximum(mean, 0.0))
+        return numpy.ceil(mean)
+
+
+class FunctionInflux(InfluxGenerator):
+    """Adapter for plain `function(step, max_influx, offset)` inputs, called once per value."""
+
+    def __init__(self, function, **kwargs):
+        self.function = function
+        super().__init__(**kwargs)
+
+    def generate(self, steps):
+        return [self.function(int(step), self.max_influx, self.offset) for step in steps]
+
+
+class RandomInflux(InfluxGenerator):
+    """Uniformly distributed integers between offset and max_influx."""
+
+    def generate(self, steps):
+        return self.rng.integers(self.offset, int(self.max_influx), size=len(steps), endpoint=True)
+
+
+class SineCurveInflux(InfluxGenerator):
+    def __init__(self, frequency=.01, **kwargs):
+        self.frequency = frequency
+        super().__init__(**kwargs)
+
+    def generate(self, steps):
+        return numpy.ceil((numpy.sin(steps * self.frequency) + 1) * self.max_influx / 2)
+
+
+class DiurnalInflux(InfluxGenerator):
+    """Daily seasonality between offset and max_influx, highest at `peak_step` of the day."""
+
+    def __init__(self, period=STEPS_PER_DAY, peak_step=STEPS_PER_DAY * 14 // 24, **kwargs):
+        self.period = period
+        self.peak_step = peak_step
+        super().__init__(**kwargs)
+
+    def generate(self, steps):
+        return self._arrivals(self._mean(steps))
+
+    def _mean(self, steps):
+        phase = 2 * math.pi * (steps - self.peak_step) / self.period
+        return self.offset + (self.max_influx - self.offset) * (numpy.cos(phase) + 1) / 2
+
+
+class WeeklyInflux(DiurnalInflux):
+    """Daily seasonality scaled per day of the week, by default with quieter weekends."""
+
+    def __init__(self, day_factors=(1.0, 1.0, 1.0, 1.0, 0.9, 0.5, 0.4), **kwargs):
+        self.day_factors = numpy.asarray(day_factors, dtype=numpy.float64)
+        super().__init__(**kwargs)
+
+    def generate(self, steps):
+        day = (steps // self.period) % len(self.day_factors)
+        return self._arrivals(self.offset + (self._mean(steps) - self.offset) * self.day_factors[day])
+
+
+class PoissonInflux(InfluxGenerator):
+    """Poisson distributed arrivals, by default centered between offset and max_influx."""
+
+    def __init__(self, rate=None, **kwargs):
+        kwargs.setdefault('poisson', True)
+        super().__init__(**kwargs)
+        self.rate = rate if rate is not None else (self.offset + self.max_influx) / 2
+
+    def generate(self, steps):
+        return self._arrivals(numpy.full(len(steps), self.rate))
+
+
+class TrendInflux(InfluxGenerator):
+    """Linear growth from offset, reaching max_influx after `duration` steps and staying there."""
+
+    def __init__(self, duration=4 * STEPS_PER_WEEK, **kwargs):
+        self.duration = duration
+        super().__init__(**kwargs)
+
+    def generate(self, steps):
+        progress = numpy.minimum(steps / self.duration, 1.0)
+        return self._arrivals(self.offset + (self.max_influx - self.offset) * progress)
+
+
+class BurstInflux(InfluxGenerator):
+    """A base load with bursts that start with `burst_probability` per step.
+
+    Bursts multiply the base load by `burst_factor` for `burst_duration` steps and may continue
+    into the next chunk.
+    """
+
+    def __init__(self, base=None, burst_probability=0.002, burst_factor=4.0, burst_duration=6, **kwargs):
+        kwargs.setdefault('poisson', True)
+        super().__init__(**kwargs)
+        self.base = base if base is not None else self.offset + (self.max_influx - self.offset) / 4
+        self.burst_probability = burst_probability
+        self.burst_factor = burst_factor
+        self.burst_duration = burst_duration
+
+    def reset(self):
+        super().reset()
+        self._last_burst = -numpy.inf
+
+    def save_state(self, writer):
+        super().save_state(writer)
+        writer.add(self._last_burst)
+
+    def load_state(self, reader):
+        super().load_state(reader)
+        self._last_burst = reader.float()
+
+    def generate(self, steps):
+        # the step each burst started at, carried over from the previous chunk
+        starts = self.rng.random(len(steps)) < 1 - (1 - self.burst_probability) ** self.change_rate
+        last_burst = numpy.maximum.accumulate(numpy.where(starts, steps, -numpy.inf))
+        last_burst = numpy.maximum(last_burst, self._last_burst)
+        if len(steps):
+            self._last_burst = last_burst[-1]
+        bursting = steps - last_burst < self.burst_duration
+        return self._arrivals(numpy.where(bursting, self.base * self.burst_factor, self.base))
+
+
+def make_influx_generator(spec, max_influx, offset, change_rate, rng):
+    """Create the generator for an `INPUTS` entry, one per environment."""
+    if 'generator' in spec:
+        generator, options = spec['generator'], spec.get('options', {})
+    else:
+        generator, options = FunctionInflux, {'function': spec['function']}
+    return generator(max_influx=max_influx, offset=offset, change_rate=change_rate, rng=rng, **options)
@@ -0,0 +1,97 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+"""Message latency estimated from the queue backlog, the arrivals and the service rate of a step.
+
+Messages arrive uniformly over a step. While the backlog carried over from the previous step is
+being worked off, or while the fleet is overloaded, a message waits for the messages in front of it
+(a fluid queue). Once the backlog is gone the fleet is treated as an M/M/c queue, with Sakasegawa's
+approximation of the probability to wait. Latency is the wait plus the service time of a message.
+"""
+
+import math
+
+PERCENTILES = (50, 95, 99)
+MAX_NEWTON_STEPS = 50
+
+
+class LatencyModel:
+
+    def __init__(self, step_size_in_seconds, slo, percentiles=PERCENTILES):
+        # all internal times are in steps
+        self.step_size_in_seconds = step_size_in_seconds
+        self.slo = slo
+        self.percentiles = tuple(percentiles)
+        self.keys = tuple('latency_p%g' % p for p in self.percentiles)
+
+    def measure(self, arrivals, backlog, instances, capacity):
+        """Latency percentiles in seconds and the number of messages above the SLO for one step."""
+        if capacity <= 0:
+            metrics = dict.fromkeys(self.keys, math.inf)
+            metrics['slo_violations'] = float(arrivals)
+            return metrics
+
+        # the service time of an average instance
+        service_time = instances / capacity
+        excess = arrivals - capacity
+        if excess < 0:
+            # the share of the arrivals behind the backlog, the rest sees an M/M/c queue
+            cleared = min(1.0, backlog / -excess)
+            waiting = _waiting_probability(arrivals / capacity, instances)
+        else:
+            cleared = waiting = 1.0
+
+        metrics = {}
+        for key, p in zip(self.keys, self.percentiles):
+            wait = self._wait(1 - p / 100, backlog, capacity, excess, cleared, waiting)
+            metrics[key] = (service_time + wait) * self.step_size_in_seconds
+        wait = self.slo / self.step_size_in_seconds - service_time
+        metrics['slo_violations'] = arrivals * self._above(wait, backlog, capacity, excess, cleared, waiting)
+        return metrics
+
+    @staticmethod
+    def _wait(tail, backlog, capacity, excess, cleared, waiting):
+        # the wait exceeded by a fraction `tail` of the arrivals
+        if excess >= 0:
+            # overloaded, the last arrivals wait longest
+            return (backlog + excess * (1 - tail)) / capacity
+        # once the backlog is worked off only the M/M/c waits are left
+        queueing = (1 - cleared) * waiting
+        if tail <= queueing * math.exp(excess * backlog / capacity):
+            return math.log(queueing / tail) / -excess
+        # below, the waits behind the backlog mix with them, the inverse of `_above` by Newton steps
+        # from no wait, which approach the root from below as the share is convex and falling
+        wait = 0.0
+        for _ in range(MAX_NEWTON_STEPS):
+            queued = queueing * math.exp(excess * wait)
+            above = (backlog - capacity * wait) / -excess + queued - tail
+            if above <= 1e-12:
+                break
+            wait += above / (capacity / -excess - excess * queued)
+        return wait
+
+    @staticmethod
+    def _above(wait, backlog, capacity, excess, cleared, waiting):
+        # fraction of the arrivals waiting longer than `wait`
+        if wait < 0:
+            return 1.0
+        if excess > 0:
+            return min(1.0, max(0.0, 1 - (capacity * wait - backlog) / excess))
+        if excess == 0:
+            return 1.0 if backlog > capacity * wait else 0.0
+        behind_backlog = min(cleared, max(0.0, (backlog - capacity * wait) / -excess))
+        return behind_backlog + (1 - cleared) * min(1.0, waiting * math.exp(excess * wait))
+
+
+def _waiting_probability(utilization, instances):
+    # Sakasegawa's approximation of the Erlang C formula, O(1) in the number of instances
+    if utilization <= 0:
+        return 0.0
+    return utilization ** (math.sqrt(2 * (instances + 1)) - 1)
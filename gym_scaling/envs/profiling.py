@@ -0,0 +1,118 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+"""Per-phase timing of ScalingEnv steps.
+
+A Profiler passed as the `profiler` option times every phase of `step()`: cost accounting and fleet
+events, influx generation, the capacity, latency and queue update, the scaling action, the
+observation and the reward, as well as `render()` and the closed form steps of `step_n()`. Without a
+profiler the probes of `step()` are no-ops. With `track_allocations` the net number of memory blocks
+allocated by Python during every phase is counted too, which adds microseconds to every phase.
+
+    profiler = Profiler(callback=print, interval=10000)
+    env = ScalingEnv(scaling_env_options={'profiler': profiler})
+    ...
+    print(profiler.prometheus())
+"""
+
+import json
+import sys
+import time
+
+STEP_PHASES = ('cost', 'influx', 'queue', 'action', 'observation', 'reward')
+PHASES = STEP_PHASES + ('render', 'fast_forward')
+
+
+def _perf_counter_ns():
+    # time.perf_counter_ns() only exists from Python 3.7
+    return int(time.perf_counter() * 1e9)
+
+
+class Profiler:
+
+    clock = staticmethod(getattr(time, 'perf_counter_ns', _perf_counter_ns))
+
+    def __init__(self, callback=None, interval=1000, track_allocations=False):
+        """`callback` is called with `snapshot()` every `interval` steps."""
+        self.callback = callback
+        self.interval = interval
+        self.track_allocations = track_allocations
+        self.reset()
+
+    def reset(self):
+        self.steps = 0
+        self.calls = dict.fromkeys(PHASES, 0)
+        self.nanoseconds = dict.fromkeys(PHASES, 0)
+        self.allocated_blocks = dict.fromkeys(PHASES, 0)
+
+    def probe(self):
+        """A timestamp, with the allocated blocks when tracked."""
+        if self.track_allocations:
+            return self.clock(), sys.getallocatedblocks()
+        return self.clock(), 0
+
+    def record(self, phase, start):
+        end = self.probe()
+        self.calls[phase] += 1
+        self.nanoseconds[phase] += end[0] - start[0]
+        self.allocated_blocks[phase] += end[1] - start[1]
+
+    def record_step(self, probes):
+        """Record the phases of one step from the probes taken before, between and after them."""
+        calls, nanoseconds, allocated_blocks = self.calls, self.nanoseconds, self.allocated_blocks
+        for phase, start, end in zip(STEP_PHASES, probes, probes[1:]):
+            calls[phase] += 1
+            nanoseconds[phase] += end[0] - start[0]
+            allocated_blocks[phase] += end[1] - start[1]
+        self.steps += 1
+        if self.callback is not None and self.steps % self.interval == 0:
+            self.callback(self.snapshot())
+
+    def snapshot(self):
+        """The counters as a JSON serializable dict, times in seconds."""
+        phases = {}
+        for phase in PHASES:
+            calls = self.calls[phase]
+            phases[phase] = {
+                'calls': calls,
+                'seconds': self.nanoseconds[phase] / 1e9,
+                'mean_us': self.nanoseconds[phase] / calls / 1e3 if calls else 0.0,
+            }
+            if self.track_allocations:
+                phases[phase]['allocated_blocks'] = self.allocated_blocks[phase]
+        return {'steps': self.steps, 'phases': phases}
+
+    def json(self):
+        return json.dumps(self.snapshot())
+
+    def prometheus(self, prefix='gym_scaling'):
+        """The counters in the Prometheus text exposition format."""
+        lines = [
+            '# HELP %s_steps_total Steps taken.' % prefix,
+            '# TYPE %s_steps_total counter' % prefix,
+            '%s_steps_total %d' % (prefix, self.steps),
+            '# HELP %s_phase_seconds_total Time spent per phase.' % prefix,
+            '# TYPE %s_phase_seconds_total counter' % prefix,
+        ]
+        lines += ['%s_phase_seconds_total{phase="%s"} %.9f' % (prefix, phase, self.nanoseconds[phase] / 1e9)
+                  for phase in PHASES]
+        lines += [
+            '# HELP %s_phase_calls_total Calls per phase.' % prefix,
+            '# TYPE %s_phase_calls_total counter' % prefix,
+        ]
+        lines += ['%s_phase_calls_total{phase="%s"} %d' % (prefix, phase, self.calls[phase]) for phase in PHASES]
+        if self.track_allocations:
+            lines += [
+                '# HELP %s_phase_allocated_blocks Net memory blocks allocated per phase.' % prefix,
+                '# TYPE %s_phase_allocated_blocks gauge' % prefix,
+            ]
+            lines += ['%s_phase_allocated_blocks{phase="%s"} %d' % (prefix, phase, self.allocated_blocks[phase])
+                      for phase in PHASES]
+        return '\n'.join(lines) + '\n'
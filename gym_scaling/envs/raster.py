@@ -0,0 +1,95 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+"""Off-screen rendering of the environment history into NumPy frames, no display required."""
+
+import numpy
+
+WHITE = (255, 255, 255)
+GREEN = (0, 255, 0)
+BLACK = (0, 0, 0)
+RED = (255, 0, 0)
+
+LINE_WIDTH = 3
+
+
+def render_history(hi_influx, hi_instances, hi_queue_size, size):
+    """Draw the influx, queue size and instance plots of `ScalingEnv.render` as an RGB frame."""
+    width, height = size
+    frame = numpy.full((height + 20, width + 20, 3), 255, dtype=numpy.uint8)
+    x_offset = 10
+    _rectangle(frame, x_offset, 10, width, height)
+    if len(hi_influx) == 0:
+        return frame
+
+    influx = numpy.asarray(hi_influx, dtype=numpy.float64)
+    instances = numpy.asarray(hi_instances, dtype=numpy.float64)
+    queue_size = numpy.asarray(hi_queue_size, dtype=numpy.float64)
+
+    max_influx_axis = max(influx.max(), queue_size.max()) or 1.0
+    max_instance_axis = instances.max() or 1.0
+    influx_scale_factor = float(height) / float(max_influx_axis)
+    instance_scale_factor = float(height) / float(max_instance_axis)
+
+    y_offset = height + 5
+    _series(frame, x_offset, (y_offset - 2) - numpy.ceil(influx_scale_factor * queue_size), y_offset - 2, RED)
+    _series(frame, x_offset, (y_offset - 1) - numpy.ceil(influx_scale_factor * influx), y_offset - 1, BLACK)
+    _series(frame, x_offset, (y_offset - 1) - instance_scale_factor * instances, y_offset - 1, GREEN)
+    return frame
+
+
+def _rectangle(frame, x, y, dx, dy, color=BLACK):
+    frame[y, x:x + dx + 1] = color
+    frame[y + dy, x:x + dx + 1] = color
+    frame[y:y + dy + 1, x] = color
+    frame[y:y + dy + 1, x + dx] = color
+
+
+def _series(frame, x_offset, y, y_start, color):
+    # every sample is joined to the previous one by a vertical span in its own column, which is
+    # what a line between neighbouring columns rasterizes to
+    columns = min(len(y), frame.shape[1] - x_offset - 1)
+    y = y[:columns]
+    y_prev = numpy.concatenate(([y_start], y[:-1]))
+
+    half_width = LINE_WIDTH // 2
+    low = numpy.minimum(y_prev, y) - half_width
+    high = numpy.maximum(y_prev, y) + half_width
+    rows = numpy.arange(frame.shape[0])[:, None]
+    mask = (rows >= low) & (rows <= high)
+    frame[:, x_offset + 1:x_offset + 1 + columns][mask] = color
+
+
+class FrameWriter:
+    """Writes frames to a GIF or MP4 file as they are produced, requires imageio.
+
+        with FrameWriter('run.gif', fps=20) as writer:
+            writer.append(env.render(mode='rgb_array'))
+    """
+
+    def __init__(self, path, fps=20):
+        try:
+            import imageio
+        except ImportError:
+            raise ImportError("writing frames requires imageio, and imageio-ffmpeg for MP4 files")
+        self.writer = imageio.get_writer(path, fps=fps)
+
+    def append(self, frame):
+        if frame is not None:
+            self.writer.append_data(frame)
+
+    def close(self):
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,195 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+"""Recording of trajectories into columnar shards on disk.
+
+Every step is one row: the observation acted on, the action, reward, done flag, the next
+observation and the state of the environment after the step. Rows are collected in preallocated
+arrays of `chunk_size` rows, so memory is bounded, and every full chunk is written as a shard
+`shard-000000.npz` with one member per column. Shards are compressed by default; uncompressed shards
+are memory-mapped by the loader instead of being read.
+
+    env = TrajectoryRecorder(ScalingEnv(), 'runs/random')
+    ...
+    env.close()
+    trajectory = load_trajectory('runs/random')
+    rewards = trajectory['reward']
+"""
+
+import glob
+import os
+import zipfile
+
+import gym
+import numpy
+
+STATE_COLUMNS = ('influx', 'instances', 'queue_size', 'load', 'total_cost')
+COLUMNS = ('step', 'episode', 'observation', 'action', 'reward', 'done', 'next_observation') + STATE_COLUMNS
+
+
+class TrajectoryRecorder(gym.Wrapper):
+
+    def __init__(self, env, directory, chunk_size=65536, compress=True):
+        super().__init__(env)
+        assert chunk_size > 0
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.compress = compress
+        os.makedirs(directory, exist_ok=True)
+        self.num_shards = len(glob.glob(os.path.join(directory, 'shard-*.npz')))
+        self.episode = -1
+        self.observation = None
+        self.columns = None
+        self.rows = 0
+
+    def reset(self, **kwargs):
+        self.observation = numpy.array(self.env.reset(**kwargs))
+        self.episode += 1
+        return self.observation
+
+    def step(self, action):
+        assert self.observation is not None, "call reset() before step()"
+        observation, reward, done, info = self.env.step(action)
+        if self.columns is None:
+            self.columns = self.__allocate(numpy.shape(action))
+        env = self.env.unwrapped
+        row = self.columns
+        i = self.rows
+        row['step'][i] = env.step_idx
+        row['episode'][i] = self.episode
+        row['observation'][i] = self.observation
+        row['action'][i] = action
+        row['reward'][i] = reward
+        row['done'][i] = done
+        row['next_observation'][i] = observation
+        row['influx'][i] = env.influx
+        row['instances'][i] = env.fleet.size
+        row['queue_size'][i] = env.queue_size
+        row['load'][i] = env.load
+        row['total_cost'][i] = env.total_cost
+        self.rows += 1
+        if self.rows == self.chunk_size:
+            self.flush()
+        # observation windows are views of a buffer the next step overwrites
+        self.observation = numpy.array(observation)
+        return observation, reward, done, info
+
+    def flush(self):
+        """Write the rows collected so far as a shard."""
+        if not self.rows:
+            return
+        path = os.path.join(self.directory, 'shard-%06d.npz' % self.num_shards)
+        save = numpy.savez_compressed if self.compress else numpy.savez
+        save(path, **{name: column[:self.rows] for name, column in self.columns.items()})
+        self.num_shards += 1
+        self.rows = 0
+
+    def close(self):
+        self.flush()
+        return self.env.close()
+
+    def __allocate(self, action_shape):
+        size = self.chunk_size
+        observation_shape = (size,) + self.observation.shape
+        columns = {
+            'step': numpy.empty(size, dtype=numpy.int64),
+            'episode': numpy.empty(size, dtype=numpy.int64),
+            'observation': numpy.empty(observation_shape),
+            'action': numpy.empty((size,) + action_shape, dtype=numpy.int64),
+            'reward': numpy.empty(size),
+            'done': numpy.empty(size, dtype=bool),
+            'next_observation': numpy.empty(observation_shape),
+        }
+        for name in STATE_COLUMNS:
+            columns[name] = numpy.empty(size)
+        return columns
+
+
+class Trajectory:
+    """The shards of a recording, indexed by column name.
+
+    `trajectory[name]` concatenates a column over all shards; `shards()` yields them one at a time,
+    which keeps memory bounded for recordings larger than RAM. Shards are opened on access, so no
+    file stays open for recordings of many shards.
+    """
+
+    def __init__(self, paths):
+        self.paths = paths
+        self.lengths = [_shard_length(path) for path in paths]
+
+    def __len__(self):
+        return sum(self.lengths)
+
+    def __getitem__(self, column):
+        parts = [_read_shard(path, (column,))[column] for path in self.paths]
+        return parts[0] if len(parts) == 1 else numpy.concatenate(parts)
+
+    @property
+    def columns(self):
+        with zipfile.ZipFile(self.paths[0]) as archive:
+            return tuple(_member_name(member) for member in archive.infolist())
+
+    def shards(self, columns=None):
+        for path in self.paths:
+            yield _read_shard(path, columns)
+
+
+def load_trajectory(directory):
+    """Open the shards of a recording in order."""
+    paths = sorted(glob.glob(os.path.join(directory, 'shard-*.npz')))
+    assert paths, "no shards in %s" % directory
+    return Trajectory(paths)
+
+
+def _member_name(member):
+    return os.path.splitext(member.filename)[0]
+
+
+def _shard_length(path):
+    # the rows of a shard from the header of its reward column, without reading the data
+    with zipfile.ZipFile(path) as archive:
+        with archive.open('reward.npy') as f:
+            return _read_header(f)[0][0]
+
+
+def _read_shard(path, columns=None):
+    # members stored without compression are memory-mapped, compressed ones are read
+    with zipfile.ZipFile(path) as archive:
+        members = {_member_name(member): member for member in archive.infolist()}
+        shard = {}
+        for name in columns or members:
+            member = members[name]
+            if member.compress_type == zipfile.ZIP_STORED:
+                shard[name] = _map_member(path, member)
+            else:
+                with archive.open(member) as f:
+                    shard[name] = numpy.lib.format.read_array(f)
+        return shard
+
+
+def _read_header(f):
+    if numpy.lib.format.read_magic(f) == (1, 0):
+        return numpy.lib.format.read_array_header_1_0(f)
+    return numpy.lib.format.read_array_header_2_0(f)
+
+
+def _map_member(path, member):
+    with open(path, 'rb') as f:
+        # the local file header: 30 bytes, then the file name and extra field
+        f.seek(member.header_offset + 26)
+        name_length, extra_length = numpy.frombuffer(f.read(4), dtype='<u2')
+        f.seek(member.header_offset + 30 + int(name_length) + int(extra_length))
+        shape, fortran_order, dtype = _read_header(f)
+        offset = f.tell()
+    if not numpy.prod(shape):
+        return numpy.empty(shape, dtype=dtype)
+    return numpy.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape,
+                        order='F' if fortran_order else 'C')
+
@@ -8,26 +8,81 @@
 # OF ANY KIND, either express or implied. See the License for the specific language
 # governing permissions and limitations under the License.
 
-import collections
-import random
+import collections.abc
 import sys
 
 import gym
 import math
 import numpy
 from gym import spaces
-from overrides import overrides
 
-from .helpers import Instance, inverse_odds
+from .billing import BILLING_PERIODS, Billing
+from .fleet import Fleet, PooledFleet
+from .forecasting import FORECASTERS, InfluxForecast, forecast_features, forecast_methods
+from .helpers import inverse_odds
+from .history import History
+from .inputs import (BurstInflux, DiurnalInflux, PoissonInflux, RandomInflux, SineCurveInflux, TrendInflux,
+                     WeeklyInflux, make_influx_generator)
+from .latency import LatencyModel
+from .snapshot import StateReader, StateWriter
+from .traces import TraceReplay
 
 INSTANCE_COSTS_PER_HOUR = {
     'c3.large': 0.192,
 }
 SCALING_STEP_SIZE_IN_SECONDS = 300  # Minimum resolution in AWS CloudWatch is 5 minutes
 
+
+def _daily_prices(mean, amplitude=0.2, peak_hour=15):
+    # hourly prices over one day, highest in the afternoon
+    return tuple(round(mean * (1 + amplitude * math.cos(2 * math.pi * (hour - peak_hour) / 24)), 4)
+                 for hour in range(24))
+
+
+# capacity in messages per step, on-demand and spot prices as hourly traces replayed cyclically,
+# interruption probability of a spot instance per step
+INSTANCE_TYPES = {
+    'c3.large': {
+        'capacity': 87,
+        'on_demand_price': (INSTANCE_COSTS_PER_HOUR['c3.large'],),
+        'spot_price': _daily_prices(0.032),
+        'interruption_probability': 0.0003,
+    },
+    'c5.large': {
+        'capacity': 110,
+        'on_demand_price': (0.085,),
+        'spot_price': _daily_prices(0.034),
+        'interruption_probability': 0.0002,
+    },
+    'c5.xlarge': {
+        'capacity': 220,
+        'on_demand_price': (0.17,),
+        'spot_price': _daily_prices(0.068),
+        'interruption_probability': 0.0002,
+    },
+    'm5.large': {
+        'capacity': 95,
+        'on_demand_price': (0.096,),
+        'spot_price': _daily_prices(0.037),
+        'interruption_probability': 0.0001,
+    },
+}
+
+# boot and drain times in seconds, uniformly distributed between (low, high), counted from the launch
+# or termination one step after the scaling action
+INSTANCE_LIFECYCLES = {
+    'c3.large': {
+        'boot_time': (120, 480),
+        'drain_time': (30, 300),
+    },
+}
+
+# columns of the observation window, the single tick observation holds the first five
+OBSERVATION_FEATURES = ('instances', 'load', 'capacity', 'influx', 'queue_size', 'influx_derivative')
+
 INPUTS = {
     'PRODUCTION_DATA': {
-        'function': lambda: None,
+        'generator': TraceReplay,
         'options': {
             'path': 'data/worker_one.xlsx',
             'sheet': 'Input',
@@ -35,19 +90,138 @@ INPUTS = {
         }
     },
     'SINE_CURVE': {
-        'function': lambda step, max_influx, offset: math.ceil((numpy.sin(float(step) * .01) + 1) * max_influx / 2),
+        'generator': SineCurveInflux,
         'options': {
         },
     },
     'RANDOM': {
-        'function': lambda step, max_influx, offset: random.randint(offset, max_influx),
+        'generator': RandomInflux,
         'options': {
         },
-    }
+    },
+    'DIURNAL': {
+        'generator': DiurnalInflux,
+        'options': {
+            'poisson': True,
+        },
+    },
+    'WEEKLY': {
+        'generator': WeeklyInflux,
+        'options': {
+            'poisson': True,
+        },
+    },
+    'BURSTS': {
+        'generator': BurstInflux,
+        'options': {
+        },
+    },
+    'POISSON': {
+        'generator': PoissonInflux,
+        'options': {
+        },
+    },
+    'TREND': {
+        'generator': TrendInflux,
+        'options': {
+            'poisson': True,
+        },
+    },
 }
 
 
+REWARDS = ('queue', 'latency')
+
+# horizons in steps of the forecast features
+FORECAST_HORIZONS = (1, 3, 12)
+
+
+def input_spec(spec):
+    """The INPUTS entry for an input name, other specs as they are."""
+    if isinstance(spec, str):
+        assert spec in INPUTS, "unknown input %s, one of %s" % (spec, ', '.join(sorted(INPUTS)))
+        return INPUTS[spec]
+    return spec
+
+
+def _no_probe():
+    # Profiler.probe of environments without a profiler
+    return None
+
+
+class ScalingConfig(collections.abc.Mapping):
+    """Validated ScalingEnv options and the values derived from them.
+
+    A read-only mapping of the options, usable wherever `scaling_env_options` are. Environments
+    created from the same config share the derived values, the observation space and the latency
+    model instead of deriving them again.
+    """
+
+    def __init__(self, scaling_env_options=None):
+        options = {**ScalingEnv.DEFAULTS, **(scaling_env_options or {})}
+        unknown = set(options) - set(ScalingEnv.DEFAULTS)
+        assert not unknown, "unknown options %s" % ', '.join(sorted(unknown))
+        options['input'] = input_spec(options['input'])
+        assert 0 <= options['min_instances'] <= options['max_instances']
+        assert options['change_rate'] >= 1
+        assert options['observation_window'] >= 0
+        assert options['reward'] in REWARDS
+        assert options['billing'] in BILLING_PERIODS
+        self.options = options
+
+        self.actions = options['discrete_actions']
+        self.observation_features = OBSERVATION_FEATURES
+        self.pools = options['instance_pools']
+        if self.pools:
+            assert not options['boot_time'] and not options['drain_time'], \
+                "instance pools launch and terminate instances immediately"
+            assert all(pool['instance_type'] in INSTANCE_TYPES for pool in self.pools)
+            self.observation_features += tuple('pool%d_instances' % i for i in range(len(self.pools)))
+            self.observation_features += tuple('pool%d_price' % i for i in range(len(self.pools)))
+        # forecasts of the influx follow the other features
+        self.forecasts = options['forecasts']
+        if self.forecasts is not None:
+            assert set(self.forecasts) <= {'methods', 'horizons'}
+            self.forecasts = {
+                'methods': forecast_methods(self.forecasts.get('methods', tuple(FORECASTERS))),
+                'horizons': tuple(self.forecasts.get('horizons', FORECAST_HORIZONS)),
+            }
+            assert all(horizon >= 1 for horizon in self.forecasts['horizons'])
+            self.observation_features += forecast_features(self.forecasts['methods'], self.forecasts['horizons'])
+        self.observation_window = options['observation_window']
+        if self.observation_window:
+            self.observation_size = len(self.observation_features)
+            self.observation_space = spaces.Box(low=-sys.float_info.max, high=sys.float_info.max,
+                                                shape=(self.observation_window, self.observation_size))
+        else:
+            # all but the influx derivative
+            self.observation_size = len(self.observation_features) - 1
+            self.observation_space = spaces.Box(low=0.0, high=sys.float_info.max, shape=(self.observation_size,))
+
+        self.max_instances = options['max_instances']
+        self.min_instances = options['min_instances']
+        self.capacity_per_instance = options['capacity_per_instance']
+        self.offset = options['offset']
+        self.sim_size = options['size']
+        self.change_rate = options['change_rate']
+        self.influx_range = ((self.max_instances / 2) * self.capacity_per_instance) - self.offset
+        self.max_influx = self.offset + self.influx_range
+        self.max_history = math.ceil(self.sim_size[0])
+        self.latency_model = LatencyModel(options['step_size_in_seconds'], options['latency_slo'])
+
+    def __getitem__(self, key):
+        return self.options[key]
+
+    def __iter__(self):
+        return iter(self.options)
+
+    def __len__(self):
+        return len(self.options)
+
+
 class ScalingEnv(gym.Env):
+    metadata = {'render.modes': ['human', 'rgb_array']}
+
     DEFAULTS = {
         'max_instances': 100.0,
         'min_instances': 2.0,
@@ -58,101 +232,268 @@ class ScalingEnv(gym.Env):
         'input': INPUTS['RANDOM'],
         'offset': 500,
         'size': (300, 250),
-        'change_rate': 10000
+        'change_rate': 10000,
+        'observation_window': 0,
+        'boot_time': 0,
+        'drain_time': 0,
+        'latency_slo': 60,
+        'reward': 'queue',
+        'instance_pools': None,
+        'billing': 'hour',
+        'minimum_billing_seconds': 60,
+        'profiler': None,
+        'forecasts': None,
     }
 
-    @overrides
     def __init__(self, *args, **kwargs):
         self.sim_size = (300, 250)
-        # Set options and defaults
-        self.scaling_env_options = {
-            **self.DEFAULTS,
-            **(kwargs.pop('scaling_env_options', {})),
-        }
-        self.actions = self.scaling_env_options['discrete_actions']
+        # Set options and defaults, derived once per ScalingConfig
+        options = kwargs.pop('scaling_env_options', None)
+        self.config = config = options if isinstance(options, ScalingConfig) else ScalingConfig(options)
+        # a copy per environment, the training scripts change it
+        self.scaling_env_options = dict(config)
+        self.actions = config.actions
         self.num_actions = len(self.actions)
         self.action_space = spaces.Discrete(self.num_actions)
-        self.observation_size = 5
-        self.observation_space = spaces.Box(low=0.0, high=sys.float_info.max, shape=(1, 5))
+        self.observation_features = config.observation_features
+        # a mixed fleet scales every pool with its own action and observes their sizes and prices
+        self.pools = config.pools
+        if self.pools:
+            self.pool_actions = numpy.array(self.actions, dtype=numpy.int64)
+            self.action_space = spaces.MultiDiscrete([self.num_actions] * len(self.pools))
+        # with a window of k ticks observations are (k, features) views over the frame buffer
+        self.observation_window = config.observation_window
+        self.observation_size = config.observation_size
+        self.observation_space = config.observation_space
+        self.frames = numpy.zeros((2 * max(self.observation_window, 1), len(self.observation_features)))
+        self.frame_position = 0
         self.window = None
-
-        self.max_instances = self.scaling_env_options['max_instances']
-        self.min_instances = self.scaling_env_options['min_instances']
-        self.capacity_per_instance = self.scaling_env_options["capacity_per_instance"]
-
-        self.offset = self.scaling_env_options['offset']
-        self.sim_size = self.scaling_env_options['size']
-        self.change_rate = self.scaling_env_options['change_rate']
-        self.influx_range = ((self.max_instances / 2) * self.capacity_per_instance) - self.offset
-        self.max_influx = self.offset + self.influx_range
-        self.max_history = math.ceil(self.sim_size[0])
+        self.profiler = config['profiler']
+        self.__probe = self.profiler.probe if self.profiler is not None else _no_probe
+        self.forecast = None
+        if config.forecasts is not None:
+            self.forecast = InfluxForecast(
+                config.forecasts['methods'], config.forecasts['horizons'], config['step_size_in_seconds'])
+        self.np_random = numpy.random.default_rng()
+        self.influx_spec = None
+        self.influx_source = None
+
+        self.max_instances = config.max_instances
+        self.min_instances = config.min_instances
+        self.capacity_per_instance = config.capacity_per_instance
+
+        self.offset = config.offset
+        self.sim_size = config.sim_size
+        self.change_rate = config.change_rate
+        self.influx_range = config.influx_range
+        self.max_influx = config.max_influx
+        self.max_history = config.max_history
+        self.latency_model = config.latency_model
+        self.history = History(('influx', 'instances', 'load', 'queue_size'), self.max_history)
+        self.rewards = History(('reward',), self.max_history * 10)
 
         super().__init__(*args, **kwargs)
+        # reset() runs on the first step instead of in the constructor
+        self.fleet = None
 
-        self.reset()
-
-    @overrides
     def step(self, action):
+        if self.fleet is None:
+            self.reset()
+        # the phases of step() with a probe before, between and after them, no-ops unless profiled
+        probe = self.__probe
+        start = probe()
         self.step_idx += 1
+        self.__charge()
+        charged = probe()
+        self.__update_influx()
+        updated = probe()
+        self.__process()
+        processed = probe()
+        self.__do_action(action)
+        acted = probe()
+        observation = self.__get_observation()
+        observed = probe()
+        reward = self.__get_reward()
+        if self.profiler is not None:
+            self.profiler.record_step((start, charged, updated, processed, acted, observed, probe()))
+
+        done = self.queue_size > self.max_influx * 10
+
+        return observation, reward, done, self.latency
+
+    def __charge(self):
+        # charged before draining instances leave at this step
+        self.total_cost += self.fleet.cost(self.step_idx)
+        self.fleet.advance(self.step_idx)
+
+    def __update_influx(self):
         if self.step_idx % self.change_rate == 0:
+            previous_influx = self.influx
             self.influx = self.__next_influx()
+            self.influx_derivative = self.influx - previous_influx
+        else:
+            self.influx_derivative = 0.0
 
-        self.hi_influx.append(self.influx)
-        self.hi_instances.append(len(self.instances))
+    def __process(self):
+        self.history.append(self.influx, self.fleet.size, self.load, self.queue_size)
+        if self.forecast:
+            self.forecast.update(self.influx)
         total_items = self.influx + self.queue_size
 
-        self.total_capacity = len(self.instances) * self.capacity_per_instance
+        self.total_capacity = self.__capacity()
+        self.latency = self.latency_model.measure(self.influx, self.queue_size, self.fleet.warm, self.total_capacity)
         processed_items = min(total_items, self.total_capacity)
 
-        self.hi_load.append(self.load)
-        self.load = math.ceil(float(processed_items) / float(self.total_capacity) * 100)
+        # while no instance is warm nothing is processed
+        self.load = math.ceil(float(processed_items) / float(self.total_capacity) * 100) if self.total_capacity else 0
 
-        self.hi_queue_size.append(self.queue_size)
         self.queue_size = total_items - processed_items
 
-        for instance in self.instances:
-            self.total_cost += instance.curr_cost(self.step_idx)
+    def step_n(self, action, k):
+        """Advance up to k steps taking the same action every step.
+
+        Equivalent to calling step(action) k times, stopping early when an episode ends. Returns the
+        last observation, the summed reward, done and the info dict of the last step with the number
+        of steps taken. While the action does not scale and the influx does not change, steps are
+        computed in closed form instead of one at a time.
+        """
+        observation, reward, done, _ = self.step(action)
+        steps = 1
+        while steps < k and not done:
+            # ticks before the influx changes again, the changing tick itself runs through step()
+            steady_ticks = min(k - steps, self.change_rate - 1 - self.step_idx % self.change_rate)
+            # as are ticks with instances getting warm or drained
+            next_event = self.fleet.next_event()
+            if next_event is not None:
+                steady_ticks = min(steady_ticks, next_event - self.step_idx - 1)
+            steady = not self.pools and self.actions[action] == 0 and self.scaling_actions[-1] == 0
+            steady = steady and self.fleet.warm > 0 and self.scaling_env_options['reward'] == 'queue'
+            steady = steady and not self.forecast
+            if steady and steady_ticks > 0:
+                start = self.profiler and self.profiler.probe()
+                ticks_reward, ticks, done = self.__fast_forward(steady_ticks)
+                observation = self.__get_observation()
+                if self.profiler is not None:
+                    self.profiler.record('fast_forward', start)
+            else:
+                observation, ticks_reward, done, _ = self.step(action)
+                ticks = 1
+            reward += ticks_reward
+            steps += ticks
+
+        return observation, reward, done, {**self.latency, 'steps': steps}
 
-        self.__do_action(action)
-        observation = self.__get_observation()
-        reward = self.__get_reward()
-
-        done = self.queue_size > self.max_influx * 10
-
-        return observation, reward, done, {}
-
-    @overrides
     def reset(self):
         self.last_actions = []
-        self.instances = []
-        for _ in range(int(self.scaling_env_options['max_instances'] / 2)):
-            self.instances.append(
-                Instance(
-                    step=0,
-                    cost_per_hour=self.capacity_per_instance
-                )
+        if self.pools:
+            self.fleet = self.__make_pooled_fleet()
+            # by default half of max_instances, split evenly between the pools
+            default_instances = int(self.max_instances / 2) // len(self.pools)
+            self.total_cost = self.fleet.launch(0, [pool.get('instances', default_instances) for pool in self.pools])
+            self.scaling_actions = [numpy.zeros(len(self.pools), dtype=numpy.int64)]
+        else:
+            self.fleet = Fleet(Billing(
+                self.scaling_env_options['step_size_in_seconds'], self.scaling_env_options['billing'],
+                self.scaling_env_options['minimum_billing_seconds']))
+            self.total_cost = self.fleet.launch(
+                step=0,
+                count=int(self.scaling_env_options['max_instances'] / 2),
+                cost_per_hour=self.scaling_env_options['cost_per_instance_per_hour']
             )
-        self.hi_instances = collections.deque(maxlen=self.max_history)
-        self.scaling_actions = collections.deque(maxlen=self.max_history)
-        self.scaling_actions.appendleft(0)
-        self.total_capacity = len(self.instances) * self.capacity_per_instance
+            self.scaling_actions = [0]
+        self.history.clear()
+        self.rewards.clear()
+        self.total_capacity = self.__capacity()
         self.load = 0.0
         self.influx_derivative = 0.0
         self.queue_size = 0.0
         self.error = 0.0
         self.step_idx = 0
-        self.hi_queue_size = collections.deque(maxlen=self.max_history)
-        self.hi_influx = collections.deque(maxlen=self.max_history)
-        self.hi_load = collections.deque(maxlen=self.max_history)
+        self.latency = {}
+        self.__reset_influx_source()
         self.influx = self.__next_influx()
+        if self.forecast:
+            self.forecast.reset(self.influx)
         self.reward = 0.0
-        self.total_cost = 0.0
-        self.collected_rewards = collections.deque(maxlen=self.max_history * 10)
+        self.frames[:] = 0.0
+        self.frame_position = 0
 
         return self.__get_observation()
 
-    @overrides
+    def get_state(self):
+        """The full simulator state as a flat float64 array, restored by set_state().
+
+        Covers the fleet, pending actions, histories, the influx generator and the random number
+        generator, so stepping after set_state(state) repeats the steps taken after get_state().
+        """
+        if self.fleet is None:
+            self.reset()
+        writer = StateWriter()
+        writer.add(self.step_idx, self.total_cost, self.influx, self.influx_derivative, self.queue_size,
+                   self.load, self.total_capacity, self.reward, self.frame_position)
+        writer.add_sized(numpy.ravel(self.scaling_actions))
+        writer.add_sized(numpy.ravel(self.last_actions))
+        writer.add(len(self.latency), *self.latency.values())
+        writer.add_array(self.frames[:len(self.frames) // 2])
+        self.history.save_state(writer)
+        self.rewards.save_state(writer)
+        self.fleet.save_state(writer)
+        self.influx_source.save_state(writer)
+        if self.forecast:
+            self.forecast.save_state(writer)
+        writer.add_rng(self.np_random)
+        return writer.pack()
+
+    def set_state(self, state):
+        """Restore a state of get_state() taken from an environment with the same options."""
+        if self.fleet is None:
+            self.reset()
+        elif self.influx_source is None:
+            self.__reset_influx_source()
+        reader = StateReader(state)
+        values = reader.values(9)
+        self.step_idx, self.frame_position = int(values[0]), int(values[8])
+        (self.total_cost, self.influx, self.influx_derivative, self.queue_size, self.load, self.total_capacity,
+         self.reward) = values[1:8]
+        scaling_actions = reader.sized().astype(numpy.int64)
+        last_actions = reader.sized().astype(numpy.int64)
+        if self.pools:
+            self.scaling_actions = [scaling_actions]
+            self.last_actions = list(last_actions.reshape(-1, len(self.pools)))
+        else:
+            self.scaling_actions = scaling_actions.tolist()
+            self.last_actions = last_actions.tolist()
+        self.latency = dict(zip(self.latency_model.keys + ('slo_violations',), reader.values(reader.int())))
+        rows = len(self.frames) // 2
+        self.frames[:rows] = self.frames[rows:] = reader.array(self.frames[:rows].size).reshape(rows, -1)
+        self.history.load_state(reader)
+        self.rewards.load_state(reader)
+        self.fleet.load_state(reader)
+        self.influx_source.load_state(reader)
+        if self.forecast:
+            self.forecast.load_state(reader)
+        reader.rng(self.np_random)
+        reader.done()
+
+    def clone(self):
+        """A new environment in the same state, without the render window."""
+        env = type(self)(scaling_env_options=dict(self.scaling_env_options))
+        env.set_state(self.get_state())
+        return env
+
     def render(self, mode='human'):
+        if self.profiler is None:
+            return self.__render(mode)
+        start = self.profiler.probe()
+        frame = self.__render(mode)
+        self.profiler.record('render', start)
+        return frame
+
+    def __render(self, mode):
+        if mode == 'rgb_array':
+            from gym_scaling.envs.raster import render_history
+            return render_history(self.hi_influx, self.hi_instances, self.hi_queue_size, self.sim_size)
+
         if len(self.collected_rewards) == 0:
             # skip rendering without at least one step
             return
@@ -170,8 +511,8 @@ class ScalingEnv(gym.Env):
 
         self.window.rectangle(x_offset, 10, self.sim_size[0], sim_height)
 
-        max_influx_axis = max(max(self.hi_influx), max(self.hi_queue_size))
-        max_instance_axis = max(self.hi_instances)
+        max_influx_axis = max(self.hi_influx.max(), self.hi_queue_size.max())
+        max_instance_axis = self.hi_instances.max()
 
         self.window.text(str(max_influx_axis), 1, 1, font_size=5)
         self.window.text(str(max_instance_axis), self.sim_size[0] + 5, 1, font_size=5)
@@ -218,31 +559,72 @@ class ScalingEnv(gym.Env):
         actions = "a: " + ' '.join(str(a) for a in self.scaling_actions)
         return [
             "frame             = %d" % self.step_idx,
-            "avg reward        = %.5f" % (sum(self.collected_rewards) / len(self.collected_rewards)),
+            "avg reward        = %.5f" % self.rewards.mean('reward'),
             "instance cost     = %d $" % math.ceil(self.total_cost),
             "load              = %d" % self.load,
-            "instances         = %d" % len(self.instances),
+            "instances         = %d" % self.fleet.size,
+            "booting/draining  = %d/%d" % (self.fleet.booting, self.fleet.draining),
             "influx            = %d" % self.influx,
             "influx_derivative = %.2f" % self.influx_derivative,
             "actions q         = %s" % actions,
-            "avg queue size    = %.3f" % (sum(self.hi_queue_size, ) / len(self.hi_queue_size)),
-            "avg instances     = %.3f" % (sum(self.hi_instances) / len(self.hi_instances)),
-            "avg load          = %.3f" % (sum(self.hi_load) / len(self.hi_load)),
+            "avg queue size    = %.3f" % self.history.mean('queue_size'),
+            "avg instances     = %.3f" % self.history.mean('instances'),
+            "avg load          = %.3f" % self.history.mean('load'),
         ]
 
-    @overrides
+    def seed(self, seed=None):
+        self.np_random = numpy.random.default_rng(seed)
+        self.influx_source = None
+        return [seed]
+
     def close(self):
         if self.window:
             self.window.close()
             self.window = None
 
+    def __reset_influx_source(self):
+        spec = input_spec(self.scaling_env_options['input'])
+        source = self.influx_source
+        if source is None or self.influx_spec is not spec or source.change_rate != self.change_rate:
+            self.influx_spec = spec
+            self.influx_source = make_influx_generator(
+                spec, self.max_influx, self.offset, self.change_rate, self.np_random)
+        else:
+            self.influx_source.reset()
+
+    def __make_pooled_fleet(self):
+        types = [INSTANCE_TYPES[pool['instance_type']] for pool in self.pools]
+        markets = [pool.get('market', 'on_demand') for pool in self.pools]
+        return PooledFleet(
+            capacity_per_instance=[instance_type['capacity'] for instance_type in types],
+            price_traces=[instance_type['spot_price' if market == 'spot' else 'on_demand_price']
+                          for instance_type, market in zip(types, markets)],
+            interruption_probability=[instance_type['interruption_probability'] if market == 'spot' else 0.0
+                                      for instance_type, market in zip(types, markets)],
+            max_instances=self.max_instances,
+            rng=self.np_random,
+            step_size_in_seconds=self.scaling_env_options['step_size_in_seconds'],
+            billing=self.scaling_env_options['billing'],
+            minimum_billing_seconds=self.scaling_env_options['minimum_billing_seconds']
+        )
+
+    def __capacity(self):
+        if self.pools:
+            return self.fleet.capacity
+        return self.fleet.warm * self.capacity_per_instance
+
     def __next_influx(self):
-        return self.scaling_env_options['input']['function'](self.step_idx, self.max_influx, self.offset)
+        if self.influx_source is None:
+            # seeded during an episode
+            self.__reset_influx_source()
+        return self.influx_source.next()
 
     def __do_action(self, action):
+        if self.pools:
+            return self.__scale_pools(action)
         assert 0 <= action < self.num_actions
 
-        # add action delay of one frame, equates instance boot time of 5 minutes
+        # add action delay of one frame, the pending state, instances then boot for `boot_time`
         if len(self.scaling_actions) == 0:
             self.scaling_actions.append(0)
 
@@ -260,36 +642,181 @@ class ScalingEnv(gym.Env):
             self.last_actions.reverse()
 
         self.reward = 0.0
-        new_instances = len(self.instances) + action
+        new_instances = self.fleet.size + action
         if self.max_instances >= new_instances >= self.min_instances:
             if action > 0:
-                for _ in range(action):
-                    self.instances.append(
-                        Instance(
-                            step=self.step_idx,
-                            cost_per_hour=self.scaling_env_options['cost_per_instance_per_hour']
-                        )
-                    )
+                self.total_cost += self.fleet.launch(
+                    step=self.step_idx,
+                    count=action,
+                    cost_per_hour=self.scaling_env_options['cost_per_instance_per_hour'],
+                    boot_steps=self.__lifecycle_steps('boot_time', action)
+                )
             if action < 0:
-                for _ in range(-1 * action):
-                    self.instances.pop(0)
+                self.fleet.terminate(
+                    -1 * action,
+                    step=self.step_idx,
+                    drain_steps=self.__lifecycle_steps('drain_time', -1 * action)
+                )
+        else:
+            self.reward += -0.1
+
+    def __scale_pools(self, action):
+        action = numpy.asarray(action, dtype=numpy.int64).reshape(len(self.pools))
+        assert ((0 <= action) & (action < self.num_actions)).all()
+
+        # add action delay of one frame like a single pool
+        new_action = self.pool_actions[action]
+        action = self.scaling_actions.pop()
+        self.scaling_actions = [new_action]
+        self.last_actions = (self.last_actions + [new_action])[-11:]
+
+        self.reward = 0.0
+        new_instances = self.fleet.size + action.sum()
+        if self.max_instances >= new_instances >= self.min_instances and (self.fleet.sizes + action >= 0).all():
+            if (action > 0).any():
+                self.total_cost += self.fleet.launch(self.step_idx, numpy.maximum(action, 0))
+            if (action < 0).any():
+                self.fleet.terminate(numpy.maximum(-action, 0))
         else:
             self.reward += -0.1
 
+    def __lifecycle_steps(self, name, count):
+        # steps until the lifecycle phase ends, one per instance when drawn from a range
+        seconds = self.scaling_env_options[name]
+        if numpy.ndim(seconds) == 0:
+            return math.ceil(seconds / self.scaling_env_options['step_size_in_seconds'])
+        low, high = seconds
+        seconds = self.np_random.uniform(low, high, size=count)
+        return numpy.ceil(seconds / self.scaling_env_options['step_size_in_seconds']).astype(numpy.int64)
+
+    def __fast_forward(self, ticks):
+        # influx and fleet are constant: the queue changes linearly until it is empty, from then on
+        # every step is identical, or until it overflows and the episode ends
+        instances = self.fleet.size
+        capacity = self.fleet.warm * self.capacity_per_instance
+        excess = self.influx - capacity
+        limit = self.max_influx * 10
+        if excess > 0:
+            transient = math.floor((limit - self.queue_size) / excess) + 1
+        elif excess < 0 and self.queue_size > 0:
+            transient = math.ceil(self.queue_size / -excess) + 1
+        else:
+            transient = 1
+        count = min(ticks, transient)
+
+        previous_queue_size = numpy.maximum(self.queue_size + numpy.arange(count) * excess, 0)
+        total_items = self.influx + previous_queue_size
+        processed_items = numpy.minimum(total_items, capacity)
+        load = numpy.ceil(processed_items / float(capacity) * 100)
+        queue_size = total_items - processed_items
+
+        done = queue_size > limit
+        if done.any():
+            count = ticks = int(done.argmax()) + 1
+            previous_queue_size, load, queue_size = previous_queue_size[:count], load[:count], queue_size[:count]
+
+        penalty = 0.0 if self.max_instances >= instances >= self.min_instances else -0.1
+        rewards = (-1 * (1 - load / 100)) * (instances / self.max_instances)
+        rewards += penalty
+        rewards -= queue_size / (1 + queue_size)
+        # ticks beyond the computed ones repeat the last of them
+        repeated = ticks - count
+
+        history = min(ticks, self.max_history)
+        self.history.extend(numpy.stack((
+            numpy.full(history, self.influx),
+            numpy.full(history, instances),
+            _tail(numpy.concatenate(([self.load], load[:-1])), load[-1], repeated, history),
+            _tail(previous_queue_size, queue_size[-1], repeated, history),
+        )))
+        self.rewards.extend(_tail(rewards, rewards[-1], repeated, min(ticks, self.rewards.capacity))[None])
+        if self.observation_window:
+            # the frames of all but the last tick, __get_observation() records the last one
+            frames = min(ticks - 1, self.observation_window)
+            self.__record_frames(numpy.stack((
+                numpy.full(frames, instances / self.max_instances),
+                _tail(load, load[-1], repeated, frames + 1)[:-1] / 100,
+                numpy.full(frames, capacity),
+                numpy.full(frames, self.influx),
+                _tail(queue_size, queue_size[-1], repeated, frames + 1)[:-1],
+                numpy.zeros(frames),
+            ), axis=1))
+        self.last_actions = (self.last_actions + [0] * min(ticks, 11))[-11:]
+
+        self.total_cost += self.fleet.cost_between(self.step_idx, self.step_idx + ticks)
+        self.step_idx += ticks
+        self.total_capacity = capacity
+        self.load = int(load[-1])
+        self.queue_size = float(queue_size[-1])
+        self.reward = penalty
+        self.influx_derivative = 0.0
+        last_queue_size = queue_size[-1] if repeated else previous_queue_size[-1]
+        self.latency = self.latency_model.measure(self.influx, float(last_queue_size), self.fleet.warm, capacity)
+
+        return float(rewards.sum()) + float(rewards[-1]) * repeated, ticks, bool(done.any())
+
     def __get_observation(self):
-        observation = numpy.zeros(self.observation_size)
-        observation[0] = len(self.instances) / self.max_instances
-        observation[1] = self.load / 100
-        observation[2] = self.total_capacity
-        observation[3] = self.influx
-        observation[4] = self.queue_size
-        return observation
+        features = (
+            self.fleet.size / self.max_instances,
+            self.load / 100,
+            self.total_capacity,
+            self.influx,
+            self.queue_size,
+            self.influx_derivative,
+        )
+        if self.pools:
+            features += tuple(self.fleet.sizes / self.max_instances) + tuple(self.fleet.prices(self.step_idx))
+        if self.forecast:
+            features += self.forecast.features()
+        if not self.observation_window:
+            return numpy.array(features[:5] + features[6:])
+        self.__record_frames((features,))
+        # valid until the next step or reset, callers keeping observations have to copy them
+        return self.frames[self.frame_position:self.frame_position + self.observation_window]
+
+    def __record_frames(self, frames):
+        # every frame is written twice, `observation_window` rows apart, so the last frames are one slice
+        window = self.observation_window
+        for frame in frames[len(frames) - window:] if len(frames) > window else frames:
+            self.frames[self.frame_position] = frame
+            self.frames[self.frame_position + window] = frame
+            self.frame_position = (self.frame_position + 1) % window
 
     def __get_reward(self):
         normalized_load = self.load / 100
-        num_instances_normalized = len(self.instances) / self.max_instances
+        num_instances_normalized = self.fleet.size / self.max_instances
         total_reward = (-1 * (1 - normalized_load)) * num_instances_normalized
         total_reward += self.reward
-        total_reward -= inverse_odds(self.queue_size)
-        self.collected_rewards.append(total_reward)
+        if self.scaling_env_options['reward'] == 'latency':
+            total_reward -= self.latency['slo_violations'] / self.influx if self.influx else 0.0
+        else:
+            total_reward -= inverse_odds(self.queue_size)
+        self.rewards.append(total_reward)
         return total_reward
+
+    @property
+    def hi_influx(self):
+        return self.history.view('influx')
+
+    @property
+    def hi_instances(self):
+        return self.history.view('instances')
+
+    @property
+    def hi_load(self):
+        return self.history.view('load')
+
+    @property
+    def hi_queue_size(self):
+        return self.history.view('queue_size')
+
+    @property
+    def collected_rewards(self):
+        return self.rewards.view('reward')
+
+
+def _tail(values, repeated_value, repeated, length):
+    # the last `length` of `values` followed by `repeated` copies of `repeated_value`
+    if repeated >= length:
+        return numpy.full(length, repeated_value, dtype=numpy.float64)
+    return numpy.concatenate((values[len(values) - (length - repeated):], numpy.full(repeated, repeated_value)))
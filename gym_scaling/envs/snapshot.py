@@ -0,0 +1,92 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+"""Packing of simulator state into one flat float64 array.
+
+Components write numbers and arrays in a fixed order and read them back in the same order,
+variable-length parts are preceded by their length. Integers are exact up to 2 ** 53.
+"""
+
+import numpy
+
+
+class StateWriter:
+
+    def __init__(self):
+        self._scalars = []
+        self._parts = []
+
+    def add(self, *values):
+        self._scalars.extend(values)
+
+    def add_array(self, values):
+        self._flush()
+        self._parts.append(numpy.ravel(values).astype(numpy.float64, copy=False))
+
+    def add_sized(self, values):
+        """An array preceded by its length."""
+        self.add(len(values))
+        self.add_array(values)
+
+    def add_rng(self, rng):
+        # the 128 bit PCG64 state as uint64 words, reinterpreted bit by bit
+        state = rng.bit_generator.state
+        assert state['bit_generator'] == 'PCG64', "only PCG64 generators are supported"
+        words = [state['state']['state'], state['state']['inc']]
+        self._flush()
+        self._parts.append(numpy.array(
+            [w >> s & 0xFFFFFFFFFFFFFFFF for w in words for s in (0, 64)] +
+            [state['has_uint32'], state['uinteger']], dtype=numpy.uint64).view(numpy.float64))
+
+    def pack(self):
+        self._flush()
+        return numpy.concatenate(self._parts) if self._parts else numpy.empty(0)
+
+    def _flush(self):
+        if self._scalars:
+            self._parts.append(numpy.array(self._scalars, dtype=numpy.float64))
+            self._scalars = []
+
+
+class StateReader:
+
+    def __init__(self, state):
+        self.state = numpy.asarray(state, dtype=numpy.float64)
+        self.position = 0
+
+    def float(self):
+        self.position += 1
+        return float(self.state[self.position - 1])
+
+    def int(self):
+        return int(self.float())
+
+    def array(self, count):
+        self.position += count
+        return self.state[self.position - count:self.position]
+
+    def values(self, count):
+        """The next `count` numbers as a list of floats."""
+        return self.array(count).tolist()
+
+    def sized(self):
+        return self.array(self.int())
+
+    def rng(self, rng):
+        words = self.array(6).view(numpy.uint64).tolist()
+        rng.bit_generator.state = {
+            'bit_generator': 'PCG64',
+            'state': {'state': words[0] | words[1] << 64, 'inc': words[2] | words[3] << 64},
+            'has_uint32': words[4],
+            'uinteger': words[5],
+        }
+
+    def done(self):
+        assert self.position == len(self.state), "the state belongs to an environment with other options"
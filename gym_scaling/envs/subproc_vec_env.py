@@ -0,0 +1,165 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+import ctypes
+import multiprocessing
+import os
+
+import numpy
+
+from .latency import PERCENTILES
+
+# the info dict of ScalingEnv.step(), passed through shared memory
+INFO_KEYS = tuple('latency_p%g' % p for p in PERCENTILES) + ('slo_violations',)
+
+
+class ScalingSubprocVecEnv:
+    """Vector environment stepping ScalingEnv copies in worker processes.
+
+    Every worker runs a contiguous slice of the environments and writes observations, rewards, dones
+    and the latency metrics of the infos straight into shared memory, only a short command goes
+    through the pipes.
+    Follows the baselines VecEnv interface, including step_async/step_wait so the caller can run
+    inference while the workers simulate. Under the 'spawn' start method the env_fns have to be
+    picklable.
+    """
+
+    def __init__(self, env_fns, num_workers=None, context=None):
+        self.num_envs = len(env_fns)
+        self.waiting = False
+        self.closed = False
+
+        env = env_fns[0]()
+        self.observation_space = env.observation_space
+        self.action_space = env.action_space
+        env.close()
+
+        ctx = multiprocessing.get_context(context)
+        shape = (self.num_envs,) + self.observation_space.shape
+        action_shape = (self.num_envs,) + self.action_space.shape
+        self._buffers = (
+            ctx.RawArray(ctypes.c_double, int(numpy.prod(shape))),
+            ctx.RawArray(ctypes.c_double, self.num_envs),
+            ctx.RawArray(ctypes.c_bool, self.num_envs),
+            ctx.RawArray(ctypes.c_int64, int(numpy.prod(action_shape))),
+            # (num_envs, len(INFO_KEYS)) row major, filled and read as flat lists
+            ctx.RawArray(ctypes.c_double, self.num_envs * len(INFO_KEYS)),
+        )
+        self._observations, self._rewards, self._dones, self._actions = _views(self._buffers, shape, action_shape)
+
+        num_workers = min(num_workers or os.cpu_count() or 1, self.num_envs)
+        bounds = numpy.linspace(0, self.num_envs, num_workers + 1).astype(int)
+        self.slices = [(int(lo), int(hi)) for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+        self.remotes, self.processes = [], []
+        for lo, hi in self.slices:
+            remote, worker_remote = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker,
+                args=(worker_remote, remote, env_fns[lo:hi], lo, hi, self._buffers, shape, action_shape),
+                daemon=True
+            )
+            process.start()
+            worker_remote.close()
+            self.remotes.append(remote)
+            self.processes.append(process)
+
+    def seed(self, seed=None):
+        self._call('seed', seed)
+        return [None if seed is None else seed + i for i in range(self.num_envs)]
+
+    def reset(self):
+        self._call('reset')
+        return self._observations.copy()
+
+    def step_async(self, actions):
+        assert not self.waiting, "step_wait has to be called before the next step_async"
+        self._actions[:] = numpy.asarray(actions).reshape(self._actions.shape)
+        for remote in self.remotes:
+            remote.send(('step', None))
+        self.waiting = True
+
+    def step_wait(self):
+        for remote in self.remotes:
+            remote.recv()
+        self.waiting = False
+        # consecutive zips over one iterator take the values row by row
+        values = iter(self._buffers[-1][:])
+        infos = [dict(zip(INFO_KEYS, values)) for _ in range(self.num_envs)]
+        return self._observations.copy(), self._rewards.copy(), self._dones.copy(), infos
+
+    def step(self, actions):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self):
+        if self.closed:
+            return
+        if self.waiting:
+            for remote in self.remotes:
+                remote.recv()
+        for remote in self.remotes:
+            remote.send(('close', None))
+        for process in self.processes:
+            process.join()
+        self.closed = True
+
+    def _call(self, command, data=None):
+        for remote in self.remotes:
+            remote.send((command, data))
+        for remote in self.remotes:
+            remote.recv()
+
+
+def _views(buffers, shape, action_shape):
+    observations, rewards, dones, actions, _ = buffers
+    return (
+        numpy.frombuffer(observations, dtype=numpy.float64).reshape(shape),
+        numpy.frombuffer(rewards, dtype=numpy.float64),
+        numpy.frombuffer(dones, dtype=numpy.bool_),
+        numpy.frombuffer(actions, dtype=numpy.int64).reshape(action_shape),
+    )
+
+
+def _worker(remote, parent_remote, env_fns, lo, hi, buffers, shape, action_shape):
+    parent_remote.close()
+    envs = [env_fn() for env_fn in env_fns]
+    observations, rewards, dones, actions = (view[lo:hi] for view in _views(buffers, shape, action_shape))
+    infos = buffers[-1]
+    try:
+        while True:
+            command, data = remote.recv()
+            if command == 'step':
+                values = []
+                for i, env in enumerate(envs):
+                    observation, rewards[i], dones[i], info = env.step(actions[i])
+                    if dones[i]:
+                        observation = env.reset()
+                    observations[i] = observation
+                    values += map(info.__getitem__, INFO_KEYS)
+                # a slice of the ctypes array takes the flat list without a numpy conversion
+                infos[lo * len(INFO_KEYS):hi * len(INFO_KEYS)] = values
+                remote.send(None)
+            elif command == 'reset':
+                for i, env in enumerate(envs):
+                    observations[i] = env.reset()
+                remote.send(None)
+            elif command == 'seed':
+                for i, env in enumerate(envs):
+                    env.seed(None if data is None else data + lo + i)
+                remote.send(None)
+            elif command == 'close':
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for env in envs:
+            env.close()
+        remote.close()
@@ -0,0 +1,193 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+"""Replay of production traffic traces.
+
+CloudWatch exports (xlsx or CSV, one row per 5 minute sample, one column per metric or worker) are
+converted once into a compiled trace: a float32 `.npy` file of shape (columns, samples), so every
+column is contiguous on disk, plus a `.json` file with the column names. Episodes replay a compiled
+trace through `numpy.memmap`, which shares the pages between all environments of a machine.
+
+    python -m gym_scaling.envs.traces data/worker_one.xlsx --sheet Input
+"""
+
+import argparse
+import array
+import contextlib
+import csv
+import json
+import os
+import tempfile
+
+import numpy
+
+from .inputs import InfluxGenerator
+
+_TRACES = {}
+
+
+def compiled_path(path):
+    root, extension = os.path.splitext(path)
+    if extension == '.npy':
+        return path
+    return root + '.npy'
+
+
+def convert_trace(source, destination=None, sheet=None, columns=None):
+    """Convert an xlsx or CSV export into a compiled trace and return its path.
+
+    `columns` selects the columns to keep by name, by default every column but the first one
+    (the timestamp). Empty cells are read as 0.
+    """
+    destination = destination or compiled_path(source)
+    if isinstance(columns, str):
+        columns = [columns]
+
+    rows = _read_rows(source, sheet)
+    header = [str(name) for name in next(rows)]
+    names = columns or header[1:]
+    for name in names:
+        if name not in header:
+            raise ValueError("column %r not found in %s" % (name, source))
+    indices = [header.index(name) for name in names]
+
+    values = [array.array('f') for _ in indices]
+    for row in rows:
+        for column, index in zip(values, indices):
+            cell = row[index] if index < len(row) else None
+            column.append(float(cell) if cell not in (None, '') else 0.0)
+
+    # both files are written next to the destination and renamed into place, the .npy last, so
+    # environments compiling or loading the same trace at the same time only see complete traces
+    with _replacing(_columns_path(destination)) as temporary:
+        with open(temporary, 'w') as f:
+            json.dump({'source': os.path.basename(source), 'columns': names}, f)
+
+    with _replacing(destination) as temporary:
+        data = numpy.lib.format.open_memmap(temporary, mode='w+', dtype=numpy.float32,
+                                            shape=(len(names), len(values[0]) if values else 0))
+        for i, column in enumerate(values):
+            data[i] = numpy.frombuffer(column, dtype=numpy.float32)
+        data.flush()
+        del data
+
+    _TRACES.pop(destination, None)
+    return destination
+
+
+def load_trace(path):
+    """Return the memory-mapped data and the column names of a compiled trace."""
+    if path not in _TRACES:
+        with open(_columns_path(path)) as f:
+            columns = json.load(f)['columns']
+        _TRACES[path] = numpy.load(path, mmap_mode='r'), columns
+    return _TRACES[path]
+
+
+class TraceReplay(InfluxGenerator):
+    """Replays one column of a trace, starting at a random offset every episode.
+
+    `path` can point at the export itself, it is compiled on first use or whenever the export is
+    newer than the compiled trace. With `column` unset, every episode picks a random column. With
+    `window` set, episodes cycle through `window` consecutive samples instead of the whole trace.
+    """
+
+    def __init__(self, path, sheet=None, column=None, window=None, scale=1.0, **kwargs):
+        trace_path = compiled_path(path)
+        if trace_path != path and (
+                not os.path.exists(trace_path) or os.path.getmtime(trace_path) < os.path.getmtime(path)):
+            convert_trace(path, trace_path, sheet=sheet)
+
+        self.data, self.columns = load_trace(trace_path)
+        if self.data.shape[1] == 0:
+            raise ValueError("trace %s has no samples" % trace_path)
+        self.column = column
+        self.window = min(window or self.data.shape[1], self.data.shape[1])
+        self.scale = scale
+        super().__init__(**kwargs)
+
+    def reset(self):
+        super().reset()
+        if self.column is None:
+            self.series_index = self.rng.integers(len(self.columns))
+        else:
+            self.series_index = self.columns.index(self.column)
+        self.series = self.data[self.series_index]
+        self.start = self.rng.integers(self.data.shape[1] - self.window + 1)
+
+    def save_state(self, writer):
+        super().save_state(writer)
+        writer.add(self.series_index, self.start)
+
+    def load_state(self, reader):
+        super().load_state(reader)
+        self.series_index = reader.int()
+        self.series = self.data[self.series_index]
+        self.start = reader.int()
+
+    def generate(self, steps):
+        if self.window == self.data.shape[1]:
+            indices = (self.start + steps) % self.window
+        else:
+            indices = self.start + steps % self.window
+        return self.series[indices] * self.scale
+
+
+def _columns_path(path):
+    return os.path.splitext(path)[0] + '.json'
+
+
+@contextlib.contextmanager
+def _replacing(path):
+    # a temporary file in the same directory, moved over `path` once written
+    fd, temporary = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    os.close(fd)
+    try:
+        yield temporary
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+def _read_rows(path, sheet):
+    if path.endswith(('.xlsx', '.xlsm')):
+        try:
+            import openpyxl
+        except ImportError:
+            raise ImportError("reading xlsx traces requires openpyxl, or export the sheet as CSV")
+
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        worksheet = workbook[sheet] if sheet else workbook.active
+        for row in worksheet.iter_rows(values_only=True):
+            yield row
+        workbook.close()
+    else:
+        with open(path, newline='') as f:
+            for row in csv.reader(f):
+                yield row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile a CloudWatch export into a replayable trace.")
+    parser.add_argument('source', help="xlsx or CSV export, one row per sample")
+    parser.add_argument('destination', nargs='?', help="compiled .npy trace, next to the source by default")
+    parser.add_argument('--sheet', help="worksheet of an xlsx export, the active one by default")
+    parser.add_argument('--column', action='append', dest='columns',
+                        help="column to keep, can be repeated, all but the first one by default")
+    args = parser.parse_args()
+
+    destination = convert_trace(args.source, args.destination, sheet=args.sheet, columns=args.columns)
+    data, columns = load_trace(destination)
+    print("%s: %d columns, %d samples" % (destination, len(columns), data.shape[1]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+import numpy
+from gym import spaces
+
+from .fleet import BatchedFleet
+from .inputs import make_influx_generator
+from .scaling_env import ScalingConfig
+
+
+INFLUX_BUFFER_SIZE = 256
+
+
+class ScalingVecEnv:
+    """N independent copies of ScalingEnv stepped with vectorized operations.
+
+    Follows the baselines VecEnv interface: done environments are reset automatically and the
+    returned observation is the first one of the new episode. Copy i seeded with `seed + i`
+    yields the same trajectory as a ScalingEnv seeded with `seed + i`.
+    """
+
+    def __init__(self, num_envs, scaling_env_options=None):
+        self.num_envs = num_envs
+        # validated like the options of ScalingEnv, a copy per environment like there
+        self.config = config = scaling_env_options if isinstance(scaling_env_options, ScalingConfig) else (
+            ScalingConfig(scaling_env_options))
+        self.scaling_env_options = dict(config)
+        self.actions = numpy.array(config.actions, dtype=numpy.int64)
+        self.num_actions = len(self.actions)
+        self.action_space = spaces.Discrete(self.num_actions)
+        assert not config.observation_window, \
+            "ScalingVecEnv returns single tick observations, use ScalingSubprocVecEnv for observation windows"
+        assert not config['boot_time'] and not config['drain_time'], \
+            "ScalingVecEnv launches and terminates instances immediately, use ScalingSubprocVecEnv for boot and drain times"
+        assert not config.pools, \
+            "ScalingVecEnv runs a single pool, use ScalingSubprocVecEnv for instance pools"
+        assert config['reward'] == 'queue', \
+            "ScalingVecEnv does not model latency, use ScalingSubprocVecEnv for the latency reward"
+        assert config.forecasts is None, \
+            "ScalingVecEnv observes no forecasts, use ScalingSubprocVecEnv for forecast features"
+        # the derived values are shared with every environment of the config
+        self.observation_size = config.observation_size
+        self.observation_space = config.observation_space
+
+        self.max_instances = config.max_instances
+        self.min_instances = config.min_instances
+        self.capacity_per_instance = config.capacity_per_instance
+        # instances every episode starts with, like ScalingEnv
+        self.initial_instances = int(self.max_instances / 2)
+
+        self.offset = config.offset
+        self.change_rate = config.change_rate
+        self.influx_range = config.influx_range
+        self.max_influx = config.max_influx
+
+        self.np_random = [numpy.random.default_rng() for _ in range(num_envs)]
+        self.inputs = [config['input']] * num_envs
+        self.influx_sources = [None] * num_envs
+        # influx values are pulled from the generators in blocks so a step gathers them at once
+        self._influx_buffer = numpy.zeros((num_envs, INFLUX_BUFFER_SIZE))
+        self._influx_position = numpy.zeros(num_envs, dtype=numpy.int64)
+        self._influx_available = numpy.zeros(num_envs, dtype=numpy.int64)
+        self.fleet = BatchedFleet(
+            num_envs, self.max_instances, self.scaling_env_options['step_size_in_seconds'],
+            self.scaling_env_options['billing'], self.scaling_env_options['minimum_billing_seconds'])
+
+        self.step_idx = numpy.zeros(num_envs, dtype=numpy.int64)
+        self.influx = numpy.zeros(num_envs)
+        self.queue_size = numpy.zeros(num_envs)
+        self.load = numpy.zeros(num_envs)
+        self.total_capacity = numpy.zeros(num_envs)
+        self.total_cost = numpy.zeros(num_envs)
+        self.scaling_actions = numpy.zeros(num_envs, dtype=numpy.int64)
+        self._actions = None
+
+    def seed(self, seed=None):
+        seeds = [None if seed is None else seed + i for i in range(self.num_envs)]
+        self.np_random = [numpy.random.default_rng(s) for s in seeds]
+        # the sources are rebuilt with the new generators and buffered influx is dropped
+        self.influx_sources = [None] * self.num_envs
+        self._influx_position[:] = 0
+        self._influx_available[:] = 0
+        return seeds
+
+    def reset(self):
+        self._reset(numpy.ones(self.num_envs, dtype=bool))
+        return self._get_observation()
+
+    def step_async(self, actions):
+        self._actions = numpy.asarray(actions, dtype=numpy.int64).reshape(self.num_envs)
+
+    def step_wait(self):
+        observation, reward, done = self._step()
+        if done.any():
+            self._reset(done)
+            observation[done] = self._get_observation()[done]
+
+        return observation, reward, done, [{} for _ in range(self.num_envs)]
+
+    def _step(self):
+        self.step_idx += 1
+        self._next_influx(self.step_idx % self.change_rate == 0)
+
+        total_items = self.influx + self.queue_size
+        self.total_capacity = self.fleet.size * float(self.capacity_per_instance)
+        processed_items = numpy.minimum(total_items, self.total_capacity)
+
+        # while the fleet is empty nothing is processed
+        self.load = numpy.ceil(numpy.divide(processed_items, self.total_capacity, out=numpy.zeros(self.num_envs),
+                                            where=self.total_capacity > 0) * 100)
+        self.queue_size = total_items - processed_items
+
+        self.total_cost += self.fleet.cost(self.step_idx)
+
+        penalty = self._do_action(self._actions)
+        observation = self._get_observation()
+        reward = self._get_reward(penalty)
+
+        done = self.queue_size > self.max_influx * 10
+        return observation, reward, done
+
+    def step(self, actions):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self):
+        pass
+
+    def _reset(self, mask):
+        self.fleet.clear(mask)
+        charges = self.fleet.launch(
+            mask,
+            step=0,
+            count=self.initial_instances,
+            cost_per_hour=self.scaling_env_options['cost_per_instance_per_hour']
+        )
+        self.scaling_actions[mask] = 0
+        self.total_capacity[mask] = self.fleet.size[mask] * float(self.capacity_per_instance)
+        self.load[mask] = 0.0
+        self.queue_size[mask] = 0.0
+        self.step_idx[mask] = 0
+        self.total_cost[mask] = charges[mask]
+        self._reset_influx_sources(mask)
+        self._next_influx(mask)
+
+    def _reset_influx_sources(self, mask):
+        for i in numpy.flatnonzero(mask):
+            if self.influx_sources[i] is None:
+                self._make_influx_source(i)
+            else:
+                self.influx_sources[i].reset()
+        self._influx_position[mask] = 0
+        self._influx_available[mask] = 0
+
+    def _make_influx_source(self, i):
+        self.influx_sources[i] = make_influx_generator(
+            self.inputs[i], self.max_influx, self.offset, self.change_rate, self.np_random[i])
+
+    def _next_influx(self, mask):
+        rows = numpy.flatnonzero(mask)
+        for i in rows[self._influx_position[rows] == self._influx_available[rows]]:
+            if self.influx_sources[i] is None:
+                # seeded during an episode
+                self._make_influx_source(i)
+            block = self.influx_sources[i].next_block(INFLUX_BUFFER_SIZE)
+            self._influx_buffer[i, :len(block)] = block
+            self._influx_available[i] = len(block)
+            self._influx_position[i] = 0
+        self.influx[rows] = self._influx_buffer[rows, self._influx_position[rows]]
+        self._influx_position[rows] += 1
+
+    def _do_action(self, actions):
+        assert ((0 <= actions) & (actions < self.num_actions)).all()
+
+        # add action delay of one frame, equates instance boot time of 5 minutes
+        action = self.scaling_actions
+        self.scaling_actions = self.actions[actions]
+
+        allowed = self._scaling_allowed(action)
+        self.total_cost += self.fleet.launch(
+            allowed & (action > 0),
+            step=self.step_idx,
+            count=action,
+            cost_per_hour=self.scaling_env_options['cost_per_instance_per_hour']
+        )
+        self.fleet.terminate(allowed & (action < 0), -action)
+        return numpy.where(allowed, 0.0, -0.1)
+
+    def _scaling_allowed(self, action):
+        new_instances = self.fleet.size + action
+        return (self.max_instances >= new_instances) & (new_instances >= self.min_instances)
+
+    def _get_observation(self):
+        observation = numpy.empty((self.num_envs, self.observation_size))
+        observation[:, 0] = self.fleet.size / self.max_instances
+        observation[:, 1] = self.load / 100
+        observation[:, 2] = self.total_capacity
+        observation[:, 3] = self.influx
+        observation[:, 4] = self.queue_size
+        return observation
+
+    def _get_reward(self, penalty):
+        normalized_load = self.load / 100
+        num_instances_normalized = self.fleet.size / self.max_instances
+        total_reward = (-1 * (1 - normalized_load)) * num_instances_normalized
+        total_reward += penalty
+        total_reward -= self.queue_size / (1 + self.queue_size)
+        return total_reward
@@ -0,0 +1,176 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+"""Evaluate a policy over a grid of scenarios in a process pool.
+
+Every combination of input, change rate, fleet bounds and seed is run for a fixed number of steps
+without rendering, and the cost, queue, latency and reward metrics are collected into one table:
+
+    python -m gym_scaling.evaluation --policy my_module:make_policy --inputs RANDOM SINE_CURVE \\
+        --change-rate 1 100 10000 --fleet-bounds 2:100 10:1000 --seeds 0 1 2 --output results.csv
+
+A policy is given as a factory `make_policy(env)` returning a function from an observation to an
+action, or as 'module:function' naming one. Factories are looked up in the worker processes, so
+models that cannot be pickled are loaded there.
+"""
+
+import argparse
+import concurrent.futures
+import csv
+import importlib
+import itertools
+import json
+
+import numpy
+
+from gym_scaling.envs.scaling_env import INPUTS, ScalingEnv
+from gym_scaling.policies import PID, StepScaling, TargetTracking
+
+
+def random_policy(env):
+    return lambda observation: env.action_space.sample()
+
+
+def hold_policy(env):
+    hold = env.scaling_env_options['discrete_actions'].index(0)
+    return lambda observation: hold
+
+
+POLICIES = {
+    'random': random_policy,
+    'hold': hold_policy,
+    'target_tracking': TargetTracking,
+    'step_scaling': StepScaling,
+    'pid': PID,
+}
+
+
+def scenario_grid(inputs=('RANDOM',), change_rates=(10000,), fleet_bounds=((2, 100),), seeds=(0,)):
+    """All combinations of input names, change rates, (min, max) instances and seeds."""
+    return [
+        {'input': name, 'change_rate': change_rate, 'min_instances': low, 'max_instances': high, 'seed': seed}
+        for name, change_rate, (low, high), seed in itertools.product(inputs, change_rates, fleet_bounds, seeds)
+    ]
+
+
+def evaluate_scenario(policy, scenario, steps=2000, scaling_env_options=None):
+    """Run one scenario for `steps` steps, resetting finished episodes, returns its metrics."""
+    env = ScalingEnv(scaling_env_options={
+        **(scaling_env_options or {}),
+        'input': INPUTS[scenario['input']],
+        'change_rate': scenario['change_rate'],
+        'min_instances': float(scenario['min_instances']),
+        'max_instances': float(scenario['max_instances']),
+    })
+    env.seed(scenario['seed'])
+    env.action_space.seed(scenario['seed'])
+    act = _load_policy(policy)(env)
+
+    observation = env.reset()
+    rewards = numpy.empty(steps)
+    queue_size = numpy.empty(steps)
+    instances = numpy.empty(steps)
+    load = numpy.empty(steps)
+    latency_p99 = numpy.empty(steps)
+    slo_violations = 0.0
+    cost = 0.0
+    episodes = 1
+    for i in range(steps):
+        observation, rewards[i], done, info = env.step(act(observation))
+        queue_size[i] = env.queue_size
+        instances[i] = env.fleet.size
+        load[i] = env.load
+        latency_p99[i] = info['latency_p99']
+        slo_violations += info['slo_violations']
+        if done:
+            cost += env.total_cost
+            observation = env.reset()
+            if hasattr(act, 'reset'):
+                act.reset()
+            episodes += 1
+    cost += env.total_cost
+    env.close()
+
+    return {
+        **scenario,
+        'steps': steps,
+        'episodes': episodes,
+        'total_reward': float(rewards.sum()),
+        'mean_reward': float(rewards.mean()),
+        'total_cost': cost,
+        'mean_queue_size': float(queue_size.mean()),
+        'max_queue_size': float(queue_size.max()),
+        'mean_instances': float(instances.mean()),
+        'mean_load': float(load.mean()),
+        'mean_latency_p99': float(latency_p99.mean()),
+        'slo_violations': slo_violations,
+    }
+
+
+def evaluate(policy, scenarios, steps=2000, scaling_env_options=None, workers=None):
+    """Evaluate all scenarios in a pool of `workers` processes, results are in scenario order."""
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(evaluate_scenario, policy, scenario, steps, scaling_env_options)
+                   for scenario in scenarios]
+        return [future.result() for future in futures]
+
+
+def write_results(results, path):
+    """Write the results table as CSV, or as JSON for a .json path."""
+    if path.endswith('.json'):
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2)
+        return
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(results[0]))
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def _load_policy(policy):
+    if callable(policy):
+        return policy
+    if policy in POLICIES:
+        return POLICIES[policy]
+    module, name = policy.split(':')
+    return getattr(importlib.import_module(module), name)
+
+
+def _fleet_bounds(value):
+    low, high = value.split(':')
+    return int(low), int(high)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate a policy over a grid of ScalingEnv scenarios.")
+    parser.add_argument('--policy', default='random', help="%s or module:factory" % ', '.join(sorted(POLICIES)))
+    parser.add_argument('--inputs', nargs='+', default=['RANDOM'],
+                        choices=sorted(name for name in INPUTS if name != 'PRODUCTION_DATA'))
+    parser.add_argument('--change-rate', type=int, nargs='+', default=[10000])
+    parser.add_argument('--fleet-bounds', type=_fleet_bounds, nargs='+', default=[(2, 100)],
+                        help="min:max instances")
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0])
+    parser.add_argument('--steps', type=int, default=2000)
+    parser.add_argument('--workers', type=int, help="processes, by default one per CPU")
+    parser.add_argument('--output', help="CSV or JSON file to write the results to")
+    args = parser.parse_args()
+
+    scenarios = scenario_grid(args.inputs, args.change_rate, args.fleet_bounds, args.seeds)
+    results = evaluate(args.policy, scenarios, steps=args.steps, workers=args.workers)
+    for result in results:
+        print("%-12s change_rate=%-6d instances=%d:%-6d seed=%-3d reward %10.2f  cost %9.2f $  queue %9.1f" % (
+            result['input'], result['change_rate'], result['min_instances'], result['max_instances'],
+            result['seed'], result['total_reward'], result['total_cost'], result['mean_queue_size']))
+    if args.output:
+        write_results(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+"""Reference autoscalers to compare trained policies with.
+
+Controllers read the first five observation features, instances / max_instances, load / 100,
+capacity, influx and queue size, of a single observation or of a batch with one row per
+environment, and return the index of the discrete action closest to the number of instances they
+want. They work with ScalingEnv, ScalingVecEnv, ScalingSubprocVecEnv and ScalingClusterEnv, and can
+be passed as `act` to the `play()` helpers of the training scripts. For observation windows pass
+the last frame, `observation[-1]`, or `observation[:, -1]` for a batch.
+"""
+
+import numpy
+
+
+class Controller:
+
+    def __init__(self, env):
+        options = env.scaling_env_options
+        assert not options['instance_pools'], "controllers scale a single instance pool"
+        self.actions = numpy.asarray(options['discrete_actions'], dtype=float)
+        self.max_instances = float(options['max_instances'])
+        self.min_instances = float(options['min_instances'])
+
+    def __call__(self, observation, stochastic=False):
+        observation = numpy.asarray(observation, dtype=float)
+        batch = observation.reshape(-1, observation.shape[-1])
+        instances = batch[:, 0] * self.max_instances
+        desired = numpy.clip(self.desired_instances(batch, instances), self.min_instances, self.max_instances)
+        action = numpy.abs((desired - instances)[:, None] - self.actions).argmin(axis=1)
+        return action if observation.ndim > 1 else int(action[0])
+
+    def desired_instances(self, observation, instances):
+        raise NotImplementedError
+
+    def reset(self, mask=None):
+        """Forget the state of finished episodes, all of them without a mask."""
+        pass
+
+
+class TargetTracking(Controller):
+    """Keeps the load at `target_load` by scaling the fleet in proportion to the load."""
+
+    def __init__(self, env, target_load=0.7):
+        super().__init__(env)
+        self.target_load = target_load
+
+    def desired_instances(self, observation, instances):
+        return numpy.ceil(instances * observation[:, 1] / self.target_load)
+
+
+class StepScaling(Controller):
+    """Scales out by the adjustment of the highest queue size threshold reached.
+
+    `steps` are (queue size, adjustment) pairs in ascending order. With an empty queue the fleet is
+    scaled in by one instance while the load is below `scale_in_load`.
+    """
+
+    def __init__(self, env, steps=((1, 1), (1000, 2), (10000, 4)), scale_in_load=0.5):
+        super().__init__(env)
+        self.thresholds = numpy.array([threshold for threshold, _ in steps], dtype=float)
+        assert (numpy.diff(self.thresholds) > 0).all(), "thresholds have to be ascending"
+        self.adjustments = numpy.array([0.0] + [adjustment for _, adjustment in steps])
+        self.scale_in_load = scale_in_load
+
+    def desired_instances(self, observation, instances):
+        queue_size = observation[:, 4]
+        adjustment = self.adjustments[numpy.searchsorted(self.thresholds, queue_size, side='right')]
+        scale_in = (queue_size == 0) & (observation[:, 1] < self.scale_in_load)
+        return instances + numpy.where(scale_in, -1.0, adjustment)
+
+
+class PID(Controller):
+    """PID control of the utilization, the load plus the queue relative to the capacity.
+
+    The output is relative to the fleet size, with kp = 1 and ki = kd = 0 it equals target tracking.
+    The integral is clipped to +-`windup` and kept per row of the batch; call `reset` with the done
+    mask of vectorized environments.
+    """
+
+    def __init__(self, env, target_load=0.7, kp=1.0, ki=0.1, kd=0.0, windup=10.0):
+        super().__init__(env)
+        self.target_load = target_load
+        self.kp, self.ki, self.kd = kp, ki, kd
+        self.windup = windup
+        self.integral = None
+        self.previous_error = None
+
+    def desired_instances(self, observation, instances):
+        load, capacity, queue_size = observation[:, 1], observation[:, 2], observation[:, 4]
+        utilization = numpy.where(capacity > 0, load + queue_size / numpy.maximum(capacity, 1), 1.0)
+        error = utilization - self.target_load
+        if self.integral is None or self.integral.shape != error.shape:
+            self.integral = numpy.zeros_like(error)
+            self.previous_error = error.copy()
+        self.integral = numpy.clip(self.integral + error, -self.windup, self.windup)
+        output = self.kp * error + self.ki * self.integral + self.kd * (error - self.previous_error)
+        self.previous_error = error
+        return instances * (1 + output / self.target_load)
+
+    def reset(self, mask=None):
+        if mask is None or self.integral is None:
+            self.integral = self.previous_error = None
+        else:
+            self.integral[mask] = 0.0
+            self.previous_error[mask] = 0.0
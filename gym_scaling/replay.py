@@ -0,0 +1,182 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+"""Offline replay buffers generated by behavior policies.
+
+A replay buffer is a directory of memory-mapped `.npy` columns with a fixed capacity, plus the
+number of transitions written so far. The generator steps many environment copies in one
+ScalingVecEnv, or ScalingSubprocVecEnv for options it does not support, and writes the transitions
+of every step as one block. Learners open the same directory read-only and sample from it while it
+is being filled, or reuse it across training runs:
+
+    python -m gym_scaling.replay runs/buffer --steps 20000 --num-envs 256 --policies random pid --epsilon 0.1
+
+Once the buffer wraps around, the oldest transitions are overwritten. A block announces the rows it
+overwrites before writing them and advances the count after, samples are drawn from the rows outside
+of it and drawn again when a block overwrote them while they were read, so samples only see complete
+transitions.
+"""
+
+import argparse
+import functools
+import os
+
+import numpy
+from numpy.lib.format import open_memmap
+
+from gym_scaling.envs import ScalingEnv, ScalingSubprocVecEnv, ScalingVecEnv
+from gym_scaling.policies import PID, StepScaling, TargetTracking
+
+BEHAVIOR_POLICIES = {
+    'random': None,
+    'target_tracking': TargetTracking,
+    'step_scaling': StepScaling,
+    'pid': PID,
+}
+
+
+class ReplayBuffer:
+
+    def __init__(self, directory, capacity=None, observation_shape=None, mode='r'):
+        """Create a buffer with `capacity` transitions in mode 'w+', open an existing one otherwise."""
+        self.directory = directory
+        if mode == 'w+':
+            os.makedirs(directory, exist_ok=True)
+            shapes = {
+                'observation': (capacity,) + tuple(observation_shape),
+                'action': (capacity,),
+                'reward': (capacity,),
+                'next_observation': (capacity,) + tuple(observation_shape),
+                'done': (capacity,),
+            }
+            dtypes = {'action': numpy.int64, 'done': numpy.bool_}
+            self.columns = {
+                name: open_memmap(self.__path(name), mode='w+', dtype=dtypes.get(name, numpy.float64), shape=shape)
+                for name, shape in shapes.items()
+            }
+            # transitions written and the end of the block being written
+            self._count = open_memmap(self.__path('count'), mode='w+', dtype=numpy.int64, shape=(2,))
+        else:
+            self.columns = {name: open_memmap(self.__path(name), mode=mode)
+                            for name in ('observation', 'action', 'reward', 'next_observation', 'done')}
+            self._count = open_memmap(self.__path('count'), mode=mode)
+        self.capacity = len(self.columns['reward'])
+
+    @property
+    def count(self):
+        """Transitions written so far, including overwritten ones."""
+        return int(self._count[0])
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def add(self, observation, action, reward, next_observation, done):
+        """Append a block of transitions, one row per environment."""
+        assert len(reward) < self.capacity, "blocks are smaller than the capacity"
+        count = self.count
+        rows = (count + numpy.arange(len(reward))) % self.capacity
+        self._count[1] = count + len(reward)
+        columns = self.columns
+        columns['observation'][rows] = observation
+        columns['action'][rows] = action
+        columns['reward'][rows] = reward
+        columns['next_observation'][rows] = next_observation
+        columns['done'][rows] = done
+        self._count[0] = count + len(reward)
+
+    def sample(self, batch_size, rng=numpy.random):
+        """Uniformly drawn (observations, actions, rewards, next observations, dones) like baselines."""
+        columns = self.columns
+        while True:
+            count, writing = self._count.tolist()
+            # transitions neither overwritten nor being overwritten
+            oldest = max(writing - self.capacity, 0)
+            indices = oldest + (rng.randint(count - oldest, size=batch_size) if rng is numpy.random
+                                else rng.integers(count - oldest, size=batch_size))
+            rows = indices % self.capacity
+            batch = (columns['observation'][rows], columns['action'][rows], columns['reward'][rows],
+                     columns['next_observation'][rows], columns['done'][rows].astype(numpy.float32))
+            if indices.min() >= int(self._count[1]) - self.capacity:
+                return batch
+
+    def flush(self):
+        for column in self.columns.values():
+            column.flush()
+        self._count.flush()
+
+    def __path(self, name):
+        return os.path.join(self.directory, name + '.npy')
+
+
+def generate(directory, steps, num_envs=64, policies=('random',), epsilon=0.0, capacity=None, seed=0,
+             scaling_env_options=None, subprocesses=False):
+    """Fill a new replay buffer with `steps` steps of `num_envs` environments.
+
+    The environments are split evenly between the behavior policies; every action is replaced by a
+    random one with probability `epsilon`. The next observation of a done transition is the first
+    one of the new episode.
+    """
+    if subprocesses:
+        env = ScalingSubprocVecEnv([functools.partial(ScalingEnv, scaling_env_options=scaling_env_options)] * num_envs)
+        # controllers only read the options
+        options_env = ScalingEnv(scaling_env_options=scaling_env_options)
+    else:
+        env = options_env = ScalingVecEnv(num_envs, scaling_env_options=scaling_env_options)
+    env.seed(seed)
+    rng = numpy.random.default_rng(seed)
+    groups = numpy.array_split(numpy.arange(num_envs), len(policies))
+    controllers = [BEHAVIOR_POLICIES[name] and BEHAVIOR_POLICIES[name](options_env) for name in policies]
+    num_actions = len(options_env.scaling_env_options['discrete_actions'])
+
+    observation = env.reset()
+    buffer = ReplayBuffer(directory, capacity or steps * num_envs, observation.shape[1:], mode='w+')
+    action = numpy.empty(num_envs, dtype=numpy.int64)
+    for _ in range(steps):
+        for group, controller in zip(groups, controllers):
+            if controller is None:
+                action[group] = rng.integers(num_actions, size=len(group))
+            else:
+                # the last frame of observation windows
+                action[group] = controller(observation[group] if observation.ndim == 2 else observation[group, -1])
+        explore = rng.random(num_envs) < epsilon
+        action[explore] = rng.integers(num_actions, size=int(explore.sum()))
+
+        next_observation, reward, done, _ = env.step(action)
+        buffer.add(observation, action, reward, next_observation, done)
+        for group, controller in zip(groups, controllers):
+            if controller is not None:
+                controller.reset(done[group])
+        observation = next_observation
+
+    env.close()
+    buffer.flush()
+    return buffer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate an offline replay buffer with behavior policies.")
+    parser.add_argument('directory')
+    parser.add_argument('--steps', type=int, default=10000, help="steps of every environment")
+    parser.add_argument('--num-envs', type=int, default=64)
+    parser.add_argument('--policies', nargs='+', default=['random'], choices=sorted(BEHAVIOR_POLICIES))
+    parser.add_argument('--epsilon', type=float, default=0.0, help="probability of a random action")
+    parser.add_argument('--capacity', type=int, help="transitions, by default steps * num_envs")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--subprocesses', action='store_true',
+                        help="step the environments in worker processes instead of one ScalingVecEnv")
+    args = parser.parse_args()
+
+    buffer = generate(args.directory, args.steps, args.num_envs, args.policies, args.epsilon, args.capacity,
+                      args.seed, subprocesses=args.subprocesses)
+    print("%d transitions written to %s" % (buffer.count, args.directory))
+
+
+if __name__ == '__main__':
+    main()
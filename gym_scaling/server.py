@@ -0,0 +1,367 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+"""Remote vector environments served over TCP.
+
+An asyncio server hosts a vector environment of `make_vec()` per connection. Every request steps all
+environments of the connection at once: the request carries the actions of all of them, the response
+the observations, rewards and dones as packed arrays, so a step costs one round trip independent of
+the number of environments. Done environments are reset automatically like in the vector
+environments.
+
+Messages are frames of a kind and a payload length, both uint32 little endian, followed by the
+payload. Only the MAKE request, its response and errors are JSON, arrays are sent as their raw bytes
+with shapes agreed on in the MAKE response:
+
+    MAKE   {"env_id", "num_envs", "backend", "scaling_env_options", "seed", "dtype"}  -> JSON spaces
+    SEED   int64 seed, empty for none                                                  -> empty
+    RESET  empty                                                                       -> observations
+    STEP   int64 actions                                   -> observations, rewards (dtype), dones (uint8)
+    CLOSE  empty, the server closes the connection
+
+Clients only set the scaling_env_options of REMOTE_OPTIONS and REMOTE_CHOICES, within bounds. The
+server has no authentication and only listens on localhost by default:
+
+    python -m gym_scaling.server --port 8765 --max-envs 4096
+    env = RemoteVecEnv('localhost', 8765, 'ScalingDiurnal-v0', num_envs=1024)
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import struct
+
+import numpy
+from gym import spaces
+
+import gym_scaling
+from gym_scaling.envs.billing import BILLING_PERIODS
+from gym_scaling.envs.scaling_env import INPUTS
+
+HEADER = struct.Struct('<II')
+MAKE, SEED, RESET, STEP, CLOSE, RESULT, ERROR = range(1, 8)
+DTYPES = ('float64', 'float32')
+
+# the scaling_env_options clients may set, with bounds on those that size the arrays of an environment,
+# any other option is rejected
+REMOTE_OPTIONS = {
+    'max_instances': (1, 1000),
+    'min_instances': (0, 1000),
+    'capacity_per_instance': (1, 1e6),
+    'cost_per_instance_per_hour': (0, 1e3),
+    'offset': (0, 1e9),
+    'change_rate': (1, 1e9),
+    'step_size_in_seconds': (60, 3600),
+    'minimum_billing_seconds': (0, 3600),
+}
+REMOTE_CHOICES = {
+    'input': tuple(INPUTS),
+    'billing': BILLING_PERIODS,
+}
+MAX_REMOTE_ACTIONS = 32
+
+
+def remote_options(options):
+    """Check the scaling_env_options of a MAKE request against REMOTE_OPTIONS and REMOTE_CHOICES."""
+    options = dict(options or {})
+    for name, value in options.items():
+        if name == 'discrete_actions':
+            assert isinstance(value, list) and 0 < len(value) <= MAX_REMOTE_ACTIONS, \
+                "discrete_actions are a list of at most %d actions" % MAX_REMOTE_ACTIONS
+            low, high = REMOTE_OPTIONS['max_instances']
+            assert all(isinstance(action, int) and -high <= action <= high for action in value), \
+                "discrete_actions are integers between %d and %d" % (-high, high)
+        elif name in REMOTE_CHOICES:
+            assert value in REMOTE_CHOICES[name], "%s is one of %s" % (name, ', '.join(REMOTE_CHOICES[name]))
+        else:
+            assert name in REMOTE_OPTIONS, "option %s cannot be set remotely" % name
+            low, high = REMOTE_OPTIONS[name]
+            assert isinstance(value, (int, float)) and low <= value <= high, \
+                "%s is a number between %g and %g" % (name, low, high)
+    return options
+
+
+class ScalingEnvServer:
+
+    def __init__(self, host='127.0.0.1', port=0, max_envs=4096):
+        """`max_envs` limits the environments of all connections together, port 0 picks a free port."""
+        self.host = host
+        self.port = port
+        self.max_envs = max_envs
+        self.num_envs = 0
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        # Server.serve_forever() only exists from Python 3.7, wait_closed() returns once closed
+        await self.server.wait_closed()
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _serve(self, reader, writer):
+        writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        loop = asyncio.get_event_loop()
+        session = None
+        try:
+            while True:
+                try:
+                    kind, length = HEADER.unpack(await reader.readexactly(HEADER.size))
+                    payload = await reader.readexactly(length)
+                except asyncio.IncompleteReadError:
+                    break
+                if kind == CLOSE:
+                    break
+                try:
+                    if kind == MAKE:
+                        assert session is None, "the connection already has environments"
+                        request = json.loads(payload)
+                        num_envs = int(request['num_envs'])
+                        available = self.max_envs - self.num_envs
+                        assert 0 < num_envs <= available, "%d environments requested, %d available" % (
+                            num_envs, available)
+                        self.num_envs += num_envs
+                        try:
+                            # environments are created and stepped outside the event loop
+                            session = await loop.run_in_executor(None, _Session, request)
+                        except Exception:
+                            self.num_envs -= num_envs
+                            raise
+                        response = [json.dumps(session.spaces).encode()]
+                    else:
+                        assert session is not None, "MAKE has to be the first request"
+                        response = await loop.run_in_executor(None, session.handle, kind, payload)
+                except Exception as error:
+                    writer.writelines(_frame(ERROR, [('%s: %s' % (type(error).__name__, error)).encode()]))
+                else:
+                    writer.writelines(_frame(RESULT, response))
+                await writer.drain()
+        finally:
+            if session is not None:
+                self.num_envs -= session.num_envs
+                await loop.run_in_executor(None, session.env.close)
+            writer.close()
+
+
+class _Session:
+    # the vector environment of one connection
+
+    def __init__(self, request):
+        self.dtype = numpy.dtype(request.get('dtype', 'float64'))
+        assert self.dtype.name in DTYPES, "dtype is one of %s" % ', '.join(DTYPES)
+        self.num_envs = int(request['num_envs'])
+        self.env = gym_scaling.make_vec(request.get('env_id', 'Scaling-v0'), self.num_envs,
+                                        backend=request.get('backend', 'numpy'),
+                                        scaling_env_options=remote_options(request.get('scaling_env_options')),
+                                        seed=request.get('seed'))
+        action_space = self.env.action_space
+        self.action_shape = (self.num_envs,) + action_space.shape
+        self.spaces = {
+            'num_envs': self.num_envs,
+            'observation_shape': list(self.env.observation_space.shape),
+            # actions per pool of mixed fleets
+            'action_nvec': action_space.nvec.tolist() if isinstance(action_space, spaces.MultiDiscrete)
+            else [int(action_space.n)],
+            'dtype': self.dtype.name,
+        }
+
+    def handle(self, kind, payload):
+        if kind == SEED:
+            # no seed without a payload
+            self.env.seed(int(numpy.frombuffer(payload, dtype='<i8')[0]) if payload else None)
+            return []
+        if kind == RESET:
+            return [self.__pack(self.env.reset())]
+        assert kind == STEP, "unknown request %d" % kind
+        actions = numpy.frombuffer(payload, dtype='<i8').reshape(self.action_shape)
+        observation, reward, done, _ = self.env.step(actions)
+        return [self.__pack(observation), self.__pack(reward), numpy.asarray(done, dtype=numpy.uint8).tobytes()]
+
+    def __pack(self, values):
+        return numpy.ascontiguousarray(values, dtype=self.dtype.newbyteorder('<')).tobytes()
+
+
+def _frame(kind, parts):
+    return [HEADER.pack(kind, sum(len(part) for part in parts))] + parts
+
+
+class _Client:
+    # encoding and decoding shared by both clients
+
+    def _make_request(self, env_id, num_envs, backend, scaling_env_options, seed, dtype):
+        return json.dumps({
+            'env_id': env_id,
+            'num_envs': num_envs,
+            'backend': backend,
+            'scaling_env_options': scaling_env_options,
+            'seed': seed,
+            'dtype': dtype,
+        }).encode()
+
+    def _set_spaces(self, response):
+        description = json.loads(response)
+        self.num_envs = description['num_envs']
+        self.dtype = numpy.dtype(description['dtype']).newbyteorder('<')
+        shape = tuple(description['observation_shape'])
+        self.observation_shape = (self.num_envs,) + shape
+        self.observation_space = spaces.Box(low=-numpy.inf, high=numpy.inf, shape=shape)
+        nvec = description['action_nvec']
+        self.action_space = spaces.Discrete(nvec[0]) if len(nvec) == 1 else spaces.MultiDiscrete(nvec)
+
+    def _pack_seed(self, seed):
+        return b'' if seed is None else struct.pack('<q', seed)
+
+    def _seeds(self, seed):
+        return [None if seed is None else seed + i for i in range(self.num_envs)]
+
+    def _pack_actions(self, actions):
+        return numpy.ascontiguousarray(actions, dtype='<i8').tobytes()
+
+    def _observation(self, payload):
+        return numpy.frombuffer(payload, dtype=self.dtype).reshape(self.observation_shape)
+
+    def _step_result(self, payload):
+        # views of the payload, observations, rewards and dones back to back
+        size = int(numpy.prod(self.observation_shape)) * self.dtype.itemsize
+        observation = numpy.frombuffer(payload, dtype=self.dtype, count=size // self.dtype.itemsize)
+        reward = numpy.frombuffer(payload, dtype=self.dtype, count=self.num_envs, offset=size)
+        done = numpy.frombuffer(payload, dtype=numpy.bool_, count=self.num_envs,
+                                offset=size + self.num_envs * self.dtype.itemsize)
+        return observation.reshape(self.observation_shape), reward, done, [{} for _ in range(self.num_envs)]
+
+
+def _check(kind, payload):
+    if kind == ERROR:
+        raise RuntimeError(payload.decode())
+    return payload
+
+
+class RemoteVecEnv(_Client):
+    """Blocking client following the baselines VecEnv interface, infos are empty."""
+
+    def __init__(self, host, port, env_id='Scaling-v0', num_envs=1, backend='numpy', scaling_env_options=None,
+                 seed=None, dtype='float64'):
+        self.socket = socket.create_connection((host, port))
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._set_spaces(self.__request(MAKE, self._make_request(
+            env_id, num_envs, backend, scaling_env_options, seed, dtype)))
+        self.closed = False
+
+    def seed(self, seed=None):
+        self.__request(SEED, self._pack_seed(seed))
+        return self._seeds(seed)
+
+    def reset(self):
+        return self._observation(self.__request(RESET))
+
+    def step_async(self, actions):
+        self.socket.sendall(b''.join(_frame(STEP, [self._pack_actions(actions)])))
+
+    def step_wait(self):
+        return self._step_result(self.__receive())
+
+    def step(self, actions):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self):
+        if not self.closed:
+            self.socket.sendall(HEADER.pack(CLOSE, 0))
+            self.socket.close()
+            self.closed = True
+
+    def __request(self, kind, payload=b''):
+        self.socket.sendall(b''.join(_frame(kind, [payload])))
+        return self.__receive()
+
+    def __receive(self):
+        kind, length = HEADER.unpack(self.__read(HEADER.size))
+        return _check(kind, self.__read(length))
+
+    def __read(self, size):
+        buffer = bytearray(size)
+        view = memoryview(buffer)
+        while view:
+            received = self.socket.recv_into(view)
+            assert received, "the server closed the connection"
+            view = view[received:]
+        return buffer
+
+
+class AsyncRemoteVecEnv(_Client):
+    """Client for asyncio learners, create it with `await AsyncRemoteVecEnv.connect(...)`."""
+
+    @classmethod
+    async def connect(cls, host, port, env_id='Scaling-v0', num_envs=1, backend='numpy', scaling_env_options=None,
+                      seed=None, dtype='float64'):
+        env = cls()
+        env.reader, env.writer = await asyncio.open_connection(host, port)
+        env.writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        env._set_spaces(await env.__request(MAKE, env._make_request(
+            env_id, num_envs, backend, scaling_env_options, seed, dtype)))
+        return env
+
+    async def seed(self, seed=None):
+        await self.__request(SEED, self._pack_seed(seed))
+        return self._seeds(seed)
+
+    async def reset(self):
+        return self._observation(await self.__request(RESET))
+
+    async def step(self, actions):
+        return self._step_result(await self.__request(STEP, self._pack_actions(actions)))
+
+    async def close(self):
+        self.writer.write(HEADER.pack(CLOSE, 0))
+        self.writer.close()
+        # StreamWriter.wait_closed() only exists from Python 3.7
+        if hasattr(self.writer, 'wait_closed'):
+            await self.writer.wait_closed()
+
+    async def __request(self, kind, payload=b''):
+        self.writer.writelines(_frame(kind, [payload]))
+        await self.writer.drain()
+        kind, length = HEADER.unpack(await self.reader.readexactly(HEADER.size))
+        return _check(kind, await self.reader.readexactly(length))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve vector environments of registered ScalingEnv variants.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-envs', type=int, default=4096, help="environments of all connections together")
+    args = parser.parse_args()
+
+    server = ScalingEnvServer(args.host, args.port, args.max_envs)
+
+    async def serve():
+        await server.start()
+        print("serving on %s:%d" % (server.host, server.port))
+        await server.serve_forever()
+
+    # asyncio.run() only exists from Python 3.7
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(serve())
+    finally:
+        loop.close()
+
+
+if __name__ == '__main__':
+    main()
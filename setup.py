@@ -13,5 +13,5 @@ from setuptools import setup
 setup(
     name='gym_scaling',
     version='0.0.1',
-    install_requires=['gym', 'overrides']
+    install_requires=['gym']
 )
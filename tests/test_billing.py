@@ -0,0 +1,52 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+
+import numpy
+import pytest
+
+from gym_scaling.envs.billing import Billing
+from gym_scaling.envs.fleet import BatchedFleet, Fleet
+
+STEP_SIZE = 300
+PRICE = 0.5
+
+
+def bill_one_instance(billing, steps, launch_step=3):
+    # the launch charge and the charges of every step until the instance is terminated
+    fleet = Fleet(Billing(STEP_SIZE, billing))
+    total = fleet.launch(launch_step, 1, PRICE)
+    for step in range(launch_step + 1, launch_step + steps + 1):
+        total += fleet.cost(step)
+    fleet.terminate(1, step=launch_step + steps)
+    fleet.advance(launch_step + steps)
+    assert fleet.cost(launch_step + steps + 1) == 0.0
+    return total
+
+
+@pytest.mark.parametrize('steps, hours', [(1, 1), (11, 1), (12, 1), (13, 2), (24, 2), (25, 3)])
+def test_started_hours(steps, hours):
+    # an instance running `steps` steps of 5 minutes pays every hour it started
+    assert bill_one_instance('hour', steps) == pytest.approx(hours * PRICE)
+
+
+@pytest.mark.parametrize('steps', [1, 2, 12, 25])
+def test_seconds(steps):
+    # at least the minimum of 60 seconds, then every second the instance ran
+    assert bill_one_instance('second', steps) == pytest.approx(max(steps * STEP_SIZE, 60) / 3600 * PRICE)
+
+
+@pytest.mark.parametrize('billing', ['hour', 'second'])
+def test_batched_fleet_matches_fleet(billing):
+    fleet = BatchedFleet(1, 10, STEP_SIZE, billing)
+    total = fleet.launch(numpy.ones(1, dtype=bool), 3, 1, PRICE)[0]
+    for step in range(4, 4 + 25):
+        total += fleet.cost(step)[0]
+    assert total == pytest.approx(bill_one_instance(billing, 25))
@@ -0,0 +1,41 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+
+import numpy
+import pytest
+
+from gym_scaling.envs import ScalingClusterEnv
+
+
+def test_episodes_start_within_budget():
+    env = ScalingClusterEnv(20, instance_budget=200)
+    env.seed(0)
+    env.reset()
+    assert env.fleet.size.tolist() == [10] * 20
+    # without a budget every service starts like ScalingEnv
+    env = ScalingClusterEnv(20)
+    env.reset()
+    assert env.fleet.size.tolist() == [50] * 20
+
+
+def test_budget_below_min_instances():
+    with pytest.raises(AssertionError):
+        ScalingClusterEnv(20, instance_budget=20)
+
+
+def test_scale_outs_stay_within_budget():
+    env = ScalingClusterEnv(4, instance_budget=42, scaling_env_options={'discrete_actions': (0, 1)})
+    env.seed(0)
+    env.reset()
+    for _ in range(10):
+        _, _, _, info = env.step(numpy.ones(4, dtype=numpy.int64))
+        assert info['instances'] <= 42
+    assert env.fleet.size.sum() == 42
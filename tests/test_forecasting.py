@@ -0,0 +1,110 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+
+import numpy
+import pytest
+
+from gym_scaling.envs import ScalingEnv
+from gym_scaling.envs.forecasting import EWMA, HoltWinters, InfluxForecast, LinearTrend, forecast_features
+
+HORIZONS = (1, 3, 12)
+
+
+def influx(steps, seed=0):
+    rng = numpy.random.RandomState(seed)
+    return 500 + 300 * numpy.sin(numpy.arange(steps) / 20) + rng.randint(0, 200, size=steps)
+
+
+def test_ewma():
+    values = influx(200)
+    forecaster = EWMA(300, alpha=0.2)
+    forecaster.reset(values[0])
+    level = values[0]
+    for value in values[1:]:
+        forecaster.update(value)
+        level = 0.2 * value + 0.8 * level
+        assert forecaster.forecast(HORIZONS) == pytest.approx([level] * 3)
+
+
+@pytest.mark.parametrize('window', [2, 12])
+def test_linear_trend_is_least_squares(window):
+    values = influx(1000)
+    forecaster = LinearTrend(300, window=window)
+    forecaster.reset(values[0])
+    assert forecaster.forecast(HORIZONS) == [values[0]] * 3
+    for i, value in enumerate(values):
+        forecaster.update(value)
+        last = values[max(0, i + 1 - window):i + 1]
+        if len(last) < 2:
+            assert forecaster.forecast(HORIZONS) == [value] * 3
+            continue
+        slope, intercept = numpy.polyfit(numpy.arange(len(last)), last, 1)
+        expected = [max(intercept + slope * (len(last) - 1 + horizon), 0.0) for horizon in HORIZONS]
+        assert forecaster.forecast(HORIZONS) == pytest.approx(expected, rel=1e-9, abs=1e-6)
+
+
+def test_holt_winters():
+    season_length, alpha, beta, gamma = 7, 0.2, 0.05, 0.3
+    values = influx(300)
+    forecaster = HoltWinters(300, alpha, beta, gamma, season_length=season_length)
+    forecaster.reset(values[0])
+    level, trend, seasonal = values[0], 0.0, numpy.zeros(season_length)
+    for t, value in enumerate(values):
+        forecaster.update(value)
+        previous = level
+        level = alpha * (value - seasonal[t % season_length]) + (1 - alpha) * (level + trend)
+        trend = beta * (level - previous) + (1 - beta) * trend
+        seasonal[t % season_length] = gamma * (value - level) + (1 - gamma) * seasonal[t % season_length]
+        expected = [max(level + h * trend + seasonal[(t + h) % season_length], 0.0) for h in HORIZONS]
+        assert forecaster.forecast(HORIZONS) == pytest.approx(expected)
+
+
+def test_holt_winters_learns_a_season():
+    pattern = numpy.array([100.0, 400.0, 900.0, 400.0])
+    forecaster = HoltWinters(300, season_length=4)
+    forecaster.reset(pattern[0])
+    for value in numpy.tile(pattern, 200):
+        forecaster.update(value)
+    assert forecaster.forecast((1, 2, 3, 4)) == pytest.approx(pattern.tolist(), abs=1.0)
+
+
+def test_forecasts_are_clipped():
+    forecaster = LinearTrend(300, window=3)
+    for value in (300.0, 200.0, 100.0):
+        forecaster.update(value)
+    assert forecaster.forecast((1, 3)) == [0.0, 0.0]
+
+
+def test_features():
+    methods = {'ewma': {'alpha': 0.5}, 'linear_trend': {}}
+    assert forecast_features(methods, (1, 3)) == (
+        'forecast_ewma_1', 'forecast_ewma_3', 'forecast_linear_trend_1', 'forecast_linear_trend_3')
+    forecast = InfluxForecast(methods, (1, 3), 300)
+    forecast.reset(100.0)
+    forecast.update(200.0)
+    assert forecast.features() == (150.0, 150.0, 200.0, 200.0)
+    with pytest.raises(AssertionError):
+        InfluxForecast(['arima'], (1,), 300)
+
+
+def test_env_observes_forecasts():
+    options = {'change_rate': 1, 'forecasts': {'methods': ('ewma',), 'horizons': (1, 3)}}
+    env = ScalingEnv(scaling_env_options=options)
+    env.seed(0)
+    observation = env.reset()
+    assert observation.shape == env.observation_space.shape == (7,)
+    forecaster = EWMA(300)
+    forecaster.reset(env.influx)
+    assert observation[-2:].tolist() == [env.influx] * 2
+    for _ in range(20):
+        observation, _, _, _ = env.step(1)
+        forecaster.update(env.influx)
+        assert observation[-2:].tolist() == forecaster.forecast((1, 3))
@@ -0,0 +1,56 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+
+import collections
+
+import numpy
+import pytest
+
+from gym_scaling.envs.history import History
+
+
+@pytest.mark.parametrize('capacity, block_size', [(7, 3), (300, 256), (5, 256)])
+def test_matches_deque(capacity, block_size):
+    history = History(('a', 'b'), capacity, block_size=block_size)
+    expected = collections.deque(maxlen=capacity)
+    rng = numpy.random.RandomState(0)
+    for step in range(1000):
+        if step % 97 == 0:
+            block = rng.rand(2, rng.randint(1, 2 * capacity))
+            history.extend(block)
+            expected.extend(block.T.tolist())
+        else:
+            values = rng.rand(2).tolist()
+            history.append(*values)
+            expected.append(values)
+        if step % 13 == 0:
+            values = numpy.array(expected).T
+            assert len(history) == len(expected)
+            numpy.testing.assert_allclose(history.view('b'), values[1])
+            numpy.testing.assert_allclose(history.window(len(expected)), values)
+            assert history.mean('a') == pytest.approx(values[0].mean())
+
+
+def test_views_are_contiguous():
+    history = History(('a',), 4)
+    for value in range(10):
+        history.append(value)
+    view = history.view('a')
+    assert view.base is history.buffer and view.flags.c_contiguous
+    assert view.tolist() == [6, 7, 8, 9]
+
+
+def test_clear():
+    history = History(('a',), 4)
+    history.extend([[1.0, 2.0]])
+    history.clear()
+    history.append(3.0)
+    assert len(history) == 1 and history.mean('a') == 3.0
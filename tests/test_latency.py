@@ -0,0 +1,121 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+
+import functools
+import math
+
+import numpy
+import pytest
+
+from gym_scaling.envs import ScalingEnv, ScalingSubprocVecEnv
+from gym_scaling.envs.latency import LatencyModel, _waiting_probability
+from gym_scaling.envs.subproc_vec_env import INFO_KEYS
+
+
+def erlang_c(instances, utilization):
+    load = utilization * instances
+    busy = load ** instances / math.factorial(instances) / (1 - utilization)
+    return busy / (sum(load ** k / math.factorial(k) for k in range(instances)) + busy)
+
+
+@pytest.mark.parametrize('instances', [1, 2, 5, 20])
+@pytest.mark.parametrize('utilization', [0.3, 0.7, 0.9])
+def test_waiting_probability(instances, utilization):
+    # exact for a single instance, an approximation beyond
+    assert _waiting_probability(utilization, instances) == pytest.approx(
+        erlang_c(instances, utilization), abs=0.06 if instances > 1 else 1e-12)
+
+
+def test_single_instance_is_mm1():
+    model = LatencyModel(step_size_in_seconds=60, slo=30)
+    metrics = model.measure(arrivals=70, backlog=0, instances=1, capacity=100)
+    # waits beyond t for a fraction rho * exp(-(mu - lambda) t) of the messages, times in steps
+    for key, p in zip(model.keys, model.percentiles):
+        tail = 1 - p / 100
+        wait = math.log(0.7 / tail) / 30 if tail < 0.7 else 0.0
+        assert metrics[key] == pytest.approx((0.01 + wait) * 60)
+    assert metrics['slo_violations'] == pytest.approx(70 * 0.7 * math.exp(-30 * (0.5 - 0.01)))
+
+
+def test_overload_is_a_fluid_queue():
+    model = LatencyModel(step_size_in_seconds=60, slo=60)
+    metrics = model.measure(arrivals=200, backlog=50, instances=1, capacity=100)
+    # the messages arriving at p percent of the step wait for the backlog and the excess before them
+    assert metrics['latency_p50'] == pytest.approx((0.01 + (50 + 100 * 0.5) / 100) * 60)
+    assert metrics['latency_p99'] == pytest.approx((0.01 + (50 + 100 * 0.99) / 100) * 60)
+    # waits above 0.99 steps start at the 49th percentile
+    assert metrics['slo_violations'] == pytest.approx(200 * 0.51)
+
+
+def test_no_capacity():
+    metrics = LatencyModel(60, 60).measure(arrivals=10, backlog=5, instances=0, capacity=0)
+    assert metrics['latency_p99'] == math.inf and metrics['slo_violations'] == 10
+
+
+def test_percentiles_agree_with_violations():
+    rng = numpy.random.RandomState(0)
+    for _ in range(1000):
+        slo = rng.uniform(1, 300)
+        model = LatencyModel(60, slo, percentiles=(50, 90))
+        instances = rng.randint(1, 50)
+        arrivals = rng.uniform(1, 200 * instances)
+        metrics = model.measure(arrivals, rng.uniform(0, 100 * instances) * rng.randint(2), instances,
+                                100 * instances)
+        assert metrics['latency_p50'] <= metrics['latency_p90']
+        share = metrics['slo_violations'] / arrivals
+        assert share <= 0.5 if metrics['latency_p50'] <= slo else share >= 0.5 - 1e-9
+        assert share <= 0.1 + 1e-9 if metrics['latency_p90'] <= slo else share >= 0.1 - 1e-9
+
+
+@pytest.mark.parametrize('backlog', [0, 6, 30, 300])
+def test_percentiles_invert_the_tail(backlog):
+    model = LatencyModel(60, 60)
+    metrics = model.measure(arrivals=150, backlog=backlog, instances=2, capacity=200)
+    waiting = _waiting_probability(0.75, 2)
+    for key, p in zip(model.keys, model.percentiles):
+        wait = metrics[key] / 60 - 0.01
+        above = model._above(wait, backlog, 200, -50, min(1.0, backlog / 50), waiting)
+        assert above == pytest.approx(1 - p / 100) if wait > 0 else above <= 1 - p / 100
+
+
+def test_latency_reward():
+    env = ScalingEnv(scaling_env_options={'reward': 'latency', 'latency_slo': 30})
+    env.seed(0)
+    env.reset()
+    for _ in range(50):
+        _, reward, _, info = env.step(1)
+        assert set(info) == set(INFO_KEYS)
+        load = env.load / 100
+        expected = -(1 - load) * env.fleet.size / env.max_instances
+        assert reward == pytest.approx(expected - info['slo_violations'] / env.influx)
+
+
+def test_subprocess_infos():
+    options = {'change_rate': 1, 'input': 'BURSTS'}
+    vec_env = ScalingSubprocVecEnv([functools.partial(ScalingEnv, scaling_env_options=options)] * 5,
+                                   num_workers=2)
+    envs = [ScalingEnv(scaling_env_options=options) for _ in range(5)]
+    try:
+        vec_env.seed(1)
+        vec_env.reset()
+        for i, env in enumerate(envs):
+            env.seed(1 + i)
+            env.reset()
+        for step in range(100):
+            actions = [step % 3] * 5
+            _, _, _, infos = vec_env.step(actions)
+            for env, info in zip(envs, infos):
+                _, _, done, expected = env.step(actions[0])
+                if done:
+                    env.reset()
+                assert info == expected
+    finally:
+        vec_env.close()
@@ -0,0 +1,60 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+
+from gym_scaling.envs import ScalingEnv
+from gym_scaling.envs.fleet import Fleet
+
+
+def capacities(options, steps=8):
+    # one instance more scaled out at the first step
+    env = ScalingEnv(scaling_env_options={'discrete_actions': (0, 1), **options})
+    env.seed(0)
+    env.reset()
+    capacity = []
+    for step in range(steps):
+        env.step(1 if step == 0 else 0)
+        capacity.append(env.total_capacity)
+    return capacity
+
+
+def test_instances_serve_after_booting():
+    immediate = capacities({})
+    # pending for a step, launched at step 2 and serving from step 3
+    assert immediate.index(max(immediate)) == 2
+    assert capacities({'boot_time': 1}) == capacities({'boot_time': 300}) == [immediate[0]] + immediate[:-1]
+    assert capacities({'boot_time': 301}) == capacities({'boot_time': 600}) == immediate[:1] * 2 + immediate[:-2]
+
+
+def test_booting_and_draining_counts():
+    fleet = Fleet()
+    fleet.launch(0, 4, 1.0)
+    fleet.launch(1, 3, 1.0, boot_steps=[1, 1, 2])
+    assert (fleet.size, fleet.warm, fleet.booting) == (7, 4, 3)
+    fleet.advance(2)
+    assert fleet.warm == 4
+    fleet.advance(3)
+    assert fleet.warm == 6
+    fleet.terminate(5, step=3, drain_steps=2)
+    assert (fleet.size, fleet.warm, fleet.draining) == (2, 1, 5)
+    fleet.advance(5)
+    assert (fleet.size, fleet.warm, fleet.draining, fleet.next_event()) == (2, 2, 0, None)
+
+
+def test_draining_instances_are_billed():
+    def cost(drain_time):
+        env = ScalingEnv(scaling_env_options={'discrete_actions': (-1, 0), 'drain_time': drain_time, 'billing': 'second'})
+        env.reset()
+        env.step(0)
+        for _ in range(30):
+            env.step(1)
+        return env.total_cost
+
+    assert cost(900) > cost(0)
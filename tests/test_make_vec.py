@@ -0,0 +1,36 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+
+import pytest
+
+import gym_scaling
+from gym_scaling.envs import ScalingVecEnv
+from gym_scaling.envs.scaling_env import INPUTS
+
+
+def test_variant_options():
+    env = gym_scaling.make_vec('ScalingDiurnal-v0', 3, scaling_env_options={'max_instances': 40}, seed=1)
+    assert isinstance(env, ScalingVecEnv)
+    assert env.config['input'] is INPUTS['DIURNAL']
+    assert (env.change_rate, env.max_instances) == (1, 40)
+    # derived once in the config
+    assert env.max_influx == env.config.max_influx
+    assert env.reset().shape == (3,) + env.observation_space.shape
+
+
+def test_unknown_variant():
+    with pytest.raises(AssertionError):
+        gym_scaling.make_vec('Scaling-v9', 2)
+
+
+def test_numpy_backend_rejects_worker_arguments():
+    with pytest.raises(AssertionError):
+        gym_scaling.make_vec('Scaling-v0', 2, num_workers=8)
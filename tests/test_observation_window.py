@@ -0,0 +1,55 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+
+import numpy
+import pytest
+
+from gym_scaling.envs import ScalingEnv
+
+
+def pair(window, **options):
+    # an environment observing a window and one observing single ticks, seeded alike
+    windowed = ScalingEnv(scaling_env_options={'observation_window': window, 'change_rate': 1, **options})
+    single = ScalingEnv(scaling_env_options={'change_rate': 1, **options})
+    windowed.seed(0)
+    single.seed(0)
+    return windowed, single
+
+
+@pytest.mark.parametrize('window', [1, 3, 8])
+def test_window_holds_the_last_ticks(window):
+    windowed, single = pair(window)
+    observation = windowed.reset()
+    assert observation.shape == windowed.observation_space.shape == (window, 6)
+    ticks = [single.reset()]
+    numpy.testing.assert_array_equal(observation[-1, :5], ticks[-1])
+    assert not observation[:-1].any()
+    rng = numpy.random.RandomState(0)
+    for _ in range(100):
+        action = rng.randint(3)
+        observation, reward, done, _ = windowed.step(action)
+        tick, expected_reward, expected_done, _ = single.step(action)
+        ticks.append(tick)
+        assert (reward, done) == (expected_reward, expected_done)
+        recent = numpy.array(ticks[-window:])
+        numpy.testing.assert_array_equal(observation[-len(recent):, :5], recent)
+        if not done:
+            # the influx derivative
+            assert observation[-1, 5] == pytest.approx(ticks[-1][3] - ticks[-2][3])
+
+
+def test_step_n_windows():
+    windowed, single = pair(4)
+    windowed.reset()
+    single.reset()
+    observation, _, _, info = windowed.step_n(1, 50)
+    ticks = [single.step(1)[0] for _ in range(info['steps'])]
+    numpy.testing.assert_allclose(observation[:, :5], ticks[-4:])
@@ -0,0 +1,88 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+
+import numpy
+import pytest
+
+from gym_scaling.envs import ScalingEnv
+from gym_scaling.envs.fleet import PooledFleet
+from gym_scaling.envs.scaling_env import INSTANCE_TYPES
+
+POOLS = [
+    {'instance_type': 'c5.large', 'market': 'spot'},
+    {'instance_type': 'm5.large', 'instances': 3},
+]
+
+
+def pooled_fleet(interruption_probability=(0.0, 0.0), billing='hour'):
+    # hourly price traces of three hours and one hour
+    return PooledFleet([10, 20], [[1.0, 2.0, 3.0], [0.5]], interruption_probability, 100,
+                       numpy.random.default_rng(0), billing=billing)
+
+
+def test_capacity_and_prices():
+    fleet = pooled_fleet()
+    fleet.launch(0, [1, 2])
+    assert fleet.size == 3 and fleet.sizes.tolist() == [1, 2] and fleet.capacity == 50
+    # every trace is replayed with its own length
+    assert fleet.prices(12).tolist() == [2.0, 0.5] and fleet.prices(36).tolist() == [1.0, 0.5]
+    fleet.terminate([5, 1])
+    assert fleet.sizes.tolist() == [0, 1] and fleet.capacity == 20
+
+
+def test_hours_are_billed_at_their_price():
+    fleet = pooled_fleet()
+    assert fleet.launch(0, [1, 2]) == 1.0 + 2 * 0.5
+    charges = {step: fleet.cost(step) for step in range(1, 50) if fleet.cost(step)}
+    assert charges == {13: 2.0 + 1.0, 25: 3.0 + 1.0, 37: 1.0 + 1.0, 49: 2.0 + 1.0}
+
+
+def test_seconds_are_billed_at_their_price():
+    fleet = pooled_fleet(billing='second')
+    total = fleet.launch(0, [1, 0])
+    total += sum(fleet.cost(step) for step in range(1, 37))
+    # the minimum at launch and twelve steps of 300 seconds in every hour of the trace
+    assert total == pytest.approx(12 * 300 / 3600 * (1.0 + 2.0 + 3.0))
+
+
+def test_interruptions():
+    fleet = pooled_fleet(interruption_probability=(1.0, 0.0))
+    fleet.launch(0, [4, 2])
+    fleet.advance(1)
+    assert fleet.interrupted == 4 and fleet.sizes.tolist() == [0, 2]
+    fleet.advance(2)
+    assert fleet.interrupted == 0
+
+
+def test_env_scales_every_pool():
+    env = ScalingEnv(scaling_env_options={'instance_pools': POOLS})
+    env.seed(0)
+    observation = env.reset()
+    assert env.action_space.nvec.tolist() == [3, 3]
+    # the instances of every pool and their prices follow the single fleet features
+    assert observation.shape == env.observation_space.shape == (5 + 2 * len(POOLS),)
+    assert env.fleet.sizes.tolist() == [25, 3]
+    prices = [INSTANCE_TYPES['c5.large']['spot_price'][0], INSTANCE_TYPES['m5.large']['on_demand_price'][0]]
+    assert env.total_cost == pytest.approx(25 * prices[0] + 3 * prices[1])
+    assert observation[-2:].tolist() == prices
+    assert observation[5:7].tolist() == [25 / env.max_instances, 3 / env.max_instances]
+
+    # actions are applied one step later, scaling a pool below zero instances is penalized
+    env.step([0, 0])
+    assert env.fleet.sizes.tolist() == [25, 3]
+    env.step([1, 0])
+    assert env.fleet.sizes.tolist() == [24, 2]
+    env.step([1, 0])
+    env.step([1, 0])
+    assert env.fleet.sizes.tolist() == [24, 0] and env.reward == 0.0
+    env.step([1, 1])
+    assert env.fleet.sizes.tolist() == [24, 0] and env.reward == -0.1
+    assert env.fleet.capacity == 24 * INSTANCE_TYPES['c5.large']['capacity']
@@ -0,0 +1,44 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+
+import numpy
+
+from gym_scaling.envs import ScalingEnv
+from gym_scaling.envs import profiling
+from gym_scaling.envs.profiling import STEP_PHASES, Profiler
+
+
+def play(profiler=None):
+    env = ScalingEnv(scaling_env_options={'profiler': profiler})
+    env.seed(0)
+    env.reset()
+    return [env.step(step % 3)[:3] for step in range(100)]
+
+
+def test_phases_are_counted():
+    snapshots = []
+    profiler = Profiler(callback=snapshots.append, interval=50)
+    play(profiler)
+    assert profiler.steps == 100 and len(snapshots) == 2
+    assert all(profiler.calls[phase] == 100 for phase in STEP_PHASES)
+    assert 'gym_scaling_steps_total 100' in profiler.prometheus()
+
+
+def test_profiling_keeps_trajectories():
+    for (observation, reward, done), expected in zip(play(Profiler()), play()):
+        numpy.testing.assert_array_equal(observation, expected[0])
+        assert (reward, done) == expected[1:]
+
+
+def test_clock_without_perf_counter_ns():
+    # Python 3.6
+    first = profiling._perf_counter_ns()
+    assert isinstance(first, int) and profiling._perf_counter_ns() >= first
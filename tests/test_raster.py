@@ -0,0 +1,55 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+
+import sys
+
+import numpy
+
+from gym_scaling.envs import ScalingEnv
+from gym_scaling.envs.raster import BLACK, GREEN, RED, render_history
+
+
+def colored(frame, color):
+    return (frame == color).all(axis=-1)
+
+
+def test_empty_history_is_the_frame():
+    frame = render_history([], [], [], (30, 20))
+    assert frame.shape == (40, 50, 3) and frame.dtype == numpy.uint8
+    border = colored(frame, BLACK)
+    assert border.sum() == 2 * 31 + 2 * 19
+    assert border[10, 10:41].all() and border[10:31, 40].all()
+
+
+def test_series_are_drawn_per_column():
+    frame = render_history([4, 4], [2, 2], [10, 10], (30, 20))
+    # scaled to the largest influx or queue size and the most instances, drawn queue size first
+    # and instances last, every sample joined to the previous one, the first to the bottom
+    black, green, red = (colored(frame, color) for color in (BLACK, GREEN, RED))
+    assert green[3:26, 11].all() and red[2, 11]
+    assert numpy.flatnonzero(red[:, 12]).tolist() == [2]
+    assert numpy.flatnonzero(green[:, 12]).tolist() == [3, 4, 5]
+    assert numpy.flatnonzero(black[:, 12]).tolist() == [10, 15, 16, 17, 30]
+    assert not (green | red)[:, 13:].any()
+
+
+def test_rgb_array_without_display():
+    env = ScalingEnv()
+    env.seed(0)
+    env.reset()
+    for _ in range(400):
+        env.step(1)
+    frame = env.render(mode='rgb_array')
+    width, height = env.sim_size
+    assert frame.shape == (height + 20, width + 20, 3)
+    # the history holds one sample per column of the plot
+    assert (frame[11:height + 10, 11:width + 10] != 255).any(axis=(0, 2)).all()
+    assert 'pyglet' not in sys.modules
@@ -0,0 +1,91 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+
+import os
+
+import numpy
+import pytest
+
+from gym_scaling.envs import ScalingEnv, TrajectoryRecorder, load_trajectory
+from gym_scaling.envs.recording import COLUMNS
+
+
+def record(directory, steps, compress=True, options=None):
+    env = TrajectoryRecorder(ScalingEnv(scaling_env_options=options), directory, chunk_size=40, compress=compress)
+    env.seed(0)
+    observations = [env.reset()]
+    rewards, dones = [], []
+    for _ in range(steps):
+        # scaling in until the queue overflows
+        observation, reward, done, _ = env.step(0)
+        rewards.append(reward)
+        dones.append(done)
+        observations.append(numpy.array(env.reset() if done else observation))
+    env.close()
+    return observations, rewards, dones
+
+
+@pytest.mark.parametrize('compress', [True, False])
+def test_round_trip(tmp_path, compress):
+    directory = str(tmp_path)
+    observations, rewards, dones = record(directory, 100, compress)
+    trajectory = load_trajectory(directory)
+    assert len(trajectory) == 100 and trajectory.lengths == [40, 40, 20]
+    assert trajectory.columns == COLUMNS
+    numpy.testing.assert_array_equal(trajectory['reward'], rewards)
+    numpy.testing.assert_array_equal(trajectory['done'], dones)
+    # the observation acted on, the next one is the last of the episode on done
+    numpy.testing.assert_array_equal(trajectory['observation'], observations[:-1])
+    next_observation = trajectory['next_observation']
+    for i in numpy.flatnonzero(~trajectory['done']):
+        numpy.testing.assert_array_equal(next_observation[i], observations[i + 1])
+    assert any(dones) and trajectory['episode'][-1] == sum(dones)
+
+    shards = list(trajectory.shards(['step', 'reward']))
+    assert [sorted(shard) for shard in shards] == [['reward', 'step']] * 3
+    assert all(isinstance(shard['reward'], numpy.memmap) != compress for shard in shards)
+
+
+def test_step_before_reset(tmp_path):
+    env = TrajectoryRecorder(ScalingEnv(), str(tmp_path))
+    with pytest.raises(AssertionError, match="reset"):
+        env.step(1)
+
+
+def test_recording_continues_a_directory(tmp_path):
+    directory = str(tmp_path)
+    record(directory, 50)
+    record(directory, 30)
+    assert sorted(os.listdir(directory)) == ['shard-%06d.npz' % i for i in range(3)]
+    assert load_trajectory(directory).lengths == [40, 10, 30]
+
+
+def test_observation_windows_are_copied(tmp_path):
+    directory = str(tmp_path)
+    observations, _, _ = record(directory, 30, options={'observation_window': 3})
+    observation = load_trajectory(directory)['observation']
+    assert observation.shape == (30, 3, 6)
+    numpy.testing.assert_array_equal(observation, observations[:-1])
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc/self/fd'), reason="counts the open files in /proc")
+@pytest.mark.parametrize('compress', [True, False])
+def test_no_open_files(tmp_path, compress):
+    directory = str(tmp_path)
+    record(directory, 200, compress)
+    open_files = len(os.listdir('/proc/self/fd'))
+    trajectory = load_trajectory(directory)
+    assert len(trajectory['reward']) == 200
+    # memory-mapped columns hold their file while they are referenced, one shard at a time
+    for shard in trajectory.shards():
+        assert len(os.listdir('/proc/self/fd')) <= open_files + (0 if compress else len(shard))
+    del shard
+    assert len(os.listdir('/proc/self/fd')) == open_files
@@ -0,0 +1,50 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+
+import numpy
+
+from gym_scaling.replay import ReplayBuffer, generate
+
+
+def add_blocks(buffer, blocks, size=4):
+    # the reward of a transition is its index
+    for _ in range(blocks):
+        index = buffer.count + numpy.arange(size)
+        buffer.add(numpy.stack([index, index], axis=1), index % 3, index, numpy.stack([index, index], axis=1) + 1,
+                   index % 5 == 0)
+
+
+def test_generate(tmp_path):
+    buffer = generate(str(tmp_path), steps=20, num_envs=8, policies=('random', 'pid'), epsilon=0.1)
+    assert buffer.count == len(buffer) == 160
+    loaded = ReplayBuffer(str(tmp_path))
+    observation, action, reward, next_observation, done = loaded.sample(32, numpy.random.default_rng(0))
+    assert observation.shape == next_observation.shape == (32, 5)
+    assert action.shape == reward.shape == done.shape == (32,) and done.dtype == numpy.float32
+
+
+def test_wraps_around(tmp_path):
+    buffer = ReplayBuffer(str(tmp_path), capacity=10, observation_shape=(2,), mode='w+')
+    add_blocks(buffer, 4)
+    assert (buffer.count, len(buffer)) == (16, 10)
+    observation, _, reward, next_observation, _ = buffer.sample(1000)
+    assert set(reward) == set(range(6, 16))
+    numpy.testing.assert_array_equal(observation[:, 0], reward)
+    numpy.testing.assert_array_equal(next_observation[:, 0], reward + 1)
+
+
+def test_samples_skip_the_block_being_written(tmp_path):
+    buffer = ReplayBuffer(str(tmp_path), capacity=10, observation_shape=(2,), mode='w+')
+    add_blocks(buffer, 4)
+    # a block of 4 announced but not written yet overwrites transitions 6 to 9
+    buffer._count[1] = buffer.count + 4
+    _, _, reward, _, _ = ReplayBuffer(str(tmp_path)).sample(1000, numpy.random.default_rng(0))
+    assert set(reward) == set(range(10, 16))
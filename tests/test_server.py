@@ -0,0 +1,90 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+
+import asyncio
+import threading
+
+import numpy
+import pytest
+
+import gym_scaling
+from gym_scaling.server import AsyncRemoteVecEnv, RemoteVecEnv, ScalingEnvServer
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+@pytest.fixture
+def server():
+    # a server on a free port in the event loop of a thread
+    loop = asyncio.new_event_loop()
+    server = ScalingEnvServer(max_envs=8)
+    loop.run_until_complete(server.start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield server
+    asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def test_steps_like_make_vec(server):
+    options = {'max_instances': 40}
+    remote = RemoteVecEnv('127.0.0.1', server.port, 'ScalingDiurnal-v0', num_envs=4, scaling_env_options=options)
+    local = gym_scaling.make_vec('ScalingDiurnal-v0', 4, scaling_env_options=options)
+    assert remote.seed(3) == local.seed(3)
+    numpy.testing.assert_array_equal(remote.reset(), local.reset())
+    rng = numpy.random.RandomState(0)
+    for _ in range(100):
+        actions = rng.randint(remote.action_space.n, size=4)
+        for received, expected in zip(remote.step(actions)[:3], local.step(actions)[:3]):
+            numpy.testing.assert_array_equal(received, expected)
+    remote.close()
+
+
+def test_async_client(server):
+    async def play():
+        env = await AsyncRemoteVecEnv.connect('127.0.0.1', server.port, num_envs=2, seed=0, dtype='float32')
+        observation = await env.reset()
+        _, reward, done, infos = await env.step(numpy.ones(2, dtype=numpy.int64))
+        await env.close()
+        return observation, reward, done, infos
+
+    observation, reward, done, infos = run(play())
+    assert observation.dtype == reward.dtype == numpy.float32
+    assert observation.shape == (2, 5) and done.shape == (2,) and infos == [{}, {}]
+
+
+@pytest.mark.parametrize('options', [
+    {'size': [10 ** 9, 10]},
+    {'max_instances': 10 ** 7},
+    {'step_size_in_seconds': 1},
+    {'input': 'NOT_AN_INPUT'},
+    {'discrete_actions': list(range(1000))},
+])
+def test_options_are_restricted(server, options):
+    with pytest.raises(RuntimeError, match='AssertionError'):
+        RemoteVecEnv('127.0.0.1', server.port, num_envs=1, scaling_env_options=options)
+    # the rejected environments do not count
+    RemoteVecEnv('127.0.0.1', server.port, num_envs=8).close()
+
+
+def test_max_envs(server):
+    env = RemoteVecEnv('127.0.0.1', server.port, num_envs=6)
+    with pytest.raises(RuntimeError, match='2 available'):
+        RemoteVecEnv('127.0.0.1', server.port, num_envs=4)
+    env.close()
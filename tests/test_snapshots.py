@@ -0,0 +1,52 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+
+import numpy
+import pytest
+
+import gym_scaling
+from gym_scaling.envs import ScalingEnv
+
+
+def play(env, actions):
+    transitions = []
+    for action in actions:
+        observation, reward, done, _ = env.step(action)
+        transitions.append((numpy.array(observation), reward, done))
+        if done:
+            env.reset()
+    return transitions
+
+
+@pytest.mark.parametrize('env_id', ['Scaling-v0', 'ScalingBursts-v0', 'ScalingPoisson-v0'])
+def test_set_state_replays(env_id):
+    options = gym_scaling.SCALING_ENVS[env_id]
+    env = ScalingEnv(scaling_env_options=options)
+    env.seed(5)
+    env.reset()
+    actions = numpy.random.RandomState(0).randint(env.action_space.n, size=500)
+    play(env, actions[:250])
+
+    state = env.get_state()
+    expected = play(env, actions[250:])
+    restored = ScalingEnv(scaling_env_options=options)
+    restored.set_state(state)
+    for (observation, reward, done), replayed in zip(expected, play(restored, actions[250:])):
+        numpy.testing.assert_array_equal(replayed[0], observation)
+        assert replayed[1:] == (reward, done)
+
+
+def test_clone_repeats_steps():
+    env = ScalingEnv()
+    env.seed(5)
+    env.reset()
+    clone = env.clone()
+    assert [env.step(1)[1] for _ in range(50)] == [clone.step(1)[1] for _ in range(50)]
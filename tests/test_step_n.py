@@ -0,0 +1,44 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+
+import numpy
+import pytest
+
+from gym_scaling.envs import ScalingEnv
+
+
+@pytest.mark.parametrize('options', [{}, {'change_rate': 7}, {'billing': 'second', 'boot_time': 600}])
+def test_step_n_matches_steps(options):
+    env, expected = ScalingEnv(scaling_env_options=options), ScalingEnv(scaling_env_options=options)
+    env.seed(5)
+    expected.seed(5)
+    env.reset()
+    expected.reset()
+    rng = numpy.random.RandomState(0)
+    for _ in range(100):
+        action, k = rng.randint(env.action_space.n), rng.randint(1, 200)
+        observation, reward, done, info = env.step_n(action, k)
+
+        total, steps = 0.0, 0
+        while steps < k:
+            expected_observation, expected_reward, expected_done, _ = expected.step(action)
+            total += expected_reward
+            steps += 1
+            if expected_done:
+                break
+        assert info['steps'] == steps
+        assert done == expected_done
+        assert reward == pytest.approx(total)
+        numpy.testing.assert_allclose(observation, expected_observation)
+        assert env.total_cost == pytest.approx(expected.total_cost)
+        if done:
+            env.reset()
+            expected.reset()
@@ -0,0 +1,54 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+
+import functools
+
+import numpy
+import pytest
+
+from gym_scaling.envs import ScalingEnv, ScalingSubprocVecEnv
+
+
+@pytest.mark.parametrize('options', [None, {'change_rate': 1, 'observation_window': 4}])
+def test_matches_scalar_envs(options):
+    num_envs = 7
+    vec_env = ScalingSubprocVecEnv([functools.partial(ScalingEnv, scaling_env_options=options)] * num_envs,
+                                   num_workers=3)
+    envs = [ScalingEnv(scaling_env_options=options) for _ in range(num_envs)]
+    try:
+        vec_env.seed(3)
+        for i, env in enumerate(envs):
+            env.seed(3 + i)
+        numpy.testing.assert_array_equal(vec_env.reset(), [env.reset() for env in envs])
+
+        rng = numpy.random.RandomState(0)
+        for _ in range(300):
+            actions = rng.randint(3, size=num_envs)
+            observations, rewards, dones, _ = vec_env.step(actions)
+            for i, env in enumerate(envs):
+                observation, reward, done, _ = env.step(actions[i])
+                if done:
+                    observation = env.reset()
+                numpy.testing.assert_array_equal(observations[i], observation)
+                assert rewards[i] == reward and dones[i] == done
+    finally:
+        vec_env.close()
+
+
+def test_step_async_before_step_wait():
+    vec_env = ScalingSubprocVecEnv([ScalingEnv] * 2, num_workers=2)
+    vec_env.reset()
+    vec_env.step_async([1, 1])
+    with pytest.raises(AssertionError):
+        vec_env.step_async([1, 1])
+    # closing waits for the pending step
+    vec_env.close()
+    assert not any(process.is_alive() for process in vec_env.processes)
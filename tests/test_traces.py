@@ -0,0 +1,80 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+
+import os
+
+import numpy
+import pytest
+
+from gym_scaling.envs.traces import TraceReplay, convert_trace, load_trace
+
+
+@pytest.fixture
+def export(tmp_path):
+    path = str(tmp_path / 'export.csv')
+    with open(path, 'w') as f:
+        f.write('timestamp,a,b\n')
+        for i in range(10):
+            f.write('%d,%d,%s\n' % (i, i, '' if i == 3 else 100 + i))
+    return path
+
+
+def test_convert(export):
+    path = convert_trace(export)
+    assert path == export[:-4] + '.npy'
+    data, columns = load_trace(path)
+    assert columns == ['a', 'b'] and data.dtype == numpy.float32
+    assert data[0].tolist() == list(range(10))
+    # empty cells are read as 0
+    assert data[1, 3] == 0 and data[1, 4] == 104
+
+    data, columns = load_trace(convert_trace(export, export[:-4] + '_b.npy', columns='b'))
+    assert columns == ['b'] and data.shape == (1, 10)
+    # no temporary files are left behind
+    assert sorted(os.listdir(os.path.dirname(export))) == [
+        'export.csv', 'export.json', 'export.npy', 'export_b.json', 'export_b.npy']
+
+    with pytest.raises(ValueError):
+        convert_trace(export, columns=['c'])
+
+
+def replay(path, **options):
+    return TraceReplay(path, max_influx=100, offset=0, change_rate=1, rng=numpy.random.default_rng(0), **options)
+
+
+def test_replay_compiles_the_export(export):
+    trace = replay(export, column='a')
+    assert os.path.exists(export[:-4] + '.npy')
+    values = [trace.next() for _ in range(25)]
+    # the whole trace from a random start, wrapping around
+    assert values == [float((trace.start + i) % 10) for i in range(25)]
+
+    with open(export, 'a') as f:
+        f.write('10,10,110\n')
+    os.utime(export, (os.path.getmtime(export) + 10,) * 2)
+    assert replay(export, column='a').data.shape == (2, 11)
+
+
+def test_replay_window(export):
+    trace = replay(export, column='b', window=4, scale=0.5)
+    assert 0 <= trace.start <= 6
+    values = [trace.next() for _ in range(12)]
+    expected = [trace.series[trace.start + i % 4] * 0.5 for i in range(12)]
+    assert values == expected
+
+
+def test_replay_random_column(export):
+    picked = set()
+    trace = replay(export)
+    for _ in range(20):
+        trace.reset()
+        picked.add(trace.series_index)
+    assert picked == {0, 1}
@@ -0,0 +1,54 @@
+# Copyright 2019 Adobe. All rights reserved.
+# This file is licensed to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy
+# of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR REPRESENTATIONS
+# OF ANY KIND, either express or implied. See the License for the specific language
+# governing permissions and limitations under the License.
+
+
+import numpy
+import pytest
+
+from gym_scaling.envs import ScalingEnv, ScalingVecEnv
+
+SEED = 5
+
+
+@pytest.mark.parametrize('options', [
+    {},
+    {'input': 'DIURNAL', 'change_rate': 1},
+    {'input': 'POISSON', 'change_rate': 1, 'billing': 'second'},
+    # fleets scaled in to no instance
+    {'min_instances': 0.0, 'discrete_actions': (-5, 0, 5)},
+])
+def test_batched_matches_scalar(options):
+    num_envs = 4
+    batched = ScalingVecEnv(num_envs, scaling_env_options=options)
+    batched.seed(SEED)
+    envs = [ScalingEnv(scaling_env_options=options) for _ in range(num_envs)]
+    for i, env in enumerate(envs):
+        env.seed(SEED + i)
+
+    numpy.testing.assert_allclose(batched.reset(), [env.reset() for env in envs])
+    rng = numpy.random.RandomState(0)
+    for _ in range(2000):
+        actions = rng.randint(batched.action_space.n, size=num_envs)
+        observation, reward, done, _ = batched.step(actions)
+        for i, env in enumerate(envs):
+            expected_observation, expected_reward, expected_done, _ = env.step(actions[i])
+            if expected_done:
+                expected_observation = env.reset()
+            numpy.testing.assert_allclose(observation[i], expected_observation)
+            assert reward[i] == pytest.approx(expected_reward)
+            assert done[i] == expected_done
+            assert batched.total_cost[i] == pytest.approx(env.total_cost)
+
+
+def test_options_are_validated():
+    with pytest.raises(AssertionError):
+        ScalingVecEnv(2, scaling_env_options={'max_instance': 10})
+    with pytest.raises(AssertionError):
+        ScalingVecEnv(2, scaling_env_options={'min_instances': 20, 'max_instances': 10})
@@ -8,20 +8,17 @@
 # OF ANY KIND, either express or implied. See the License for the specific language
 # governing permissions and limitations under the License.
 
-import random
-
 import gym
 import gym_scaling
 
-from baselines import deepq
-from baselines.common import models
-from gym_scaling.envs.scaling_env import INPUTS
-
 
 def main():
-    random.seed(10)
+    # baselines pulls in tensorflow, imported here so importing play() stays light
+    from baselines import deepq
+    from baselines.common import models
 
     env = gym.make('Scaling-v0')
+    env.seed(10)
     act = deepq.learn(
         env,
         network=models.mlp(num_hidden=20, num_layers=1),
@@ -36,14 +33,13 @@ def main():
     )
 
     # play model using shorter change rate
-    env.change_rate = 100
+    env = gym.make('ScalingRandom-v0')
 
     frames = 1000
     play(act, env, frames)
 
     # play sine curve
-    env.change_rate = 1
-    env.scaling_env_options['input'] = INPUTS['SINE_CURVE']
+    env = gym.make('ScalingSineCurve-v0')
 
     play(act, env, frames)
 
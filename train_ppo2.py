@@ -12,21 +12,17 @@
 import gym
 import gym_scaling
 
-from baselines import deepq
-from baselines.common import models
-from baselines.common.vec_env import DummyVecEnv
-from baselines.ppo2 import ppo2
-from gym_scaling.envs.scaling_env import INPUTS
 import numpy as np
 
-
-def makeEnv():
-    return gym.make('Scaling-v0')
+NUM_ENVS = 16
 
 
 def main():
-    vecEnv = DummyVecEnv([makeEnv])
-    env = vecEnv.envs[0]
+    # baselines pulls in tensorflow, imported here so importing play() stays light
+    from baselines.common import models
+    from baselines.ppo2 import ppo2
+
+    vecEnv = gym_scaling.make_vec('Scaling-v0', NUM_ENVS, seed=0)
     model = ppo2.learn(
         network=models.mlp(num_hidden=20, num_layers=1),
         env=vecEnv,
@@ -34,16 +30,13 @@ def main():
     )
 
     # play model using shorter change rate
-    env.change_rate = 100
-
+    env = gym.make('ScalingRandom-v0')
     play(env, model, 1000)
+    env.close()
 
     # play sine curve
-    env.change_rate = 1
-    env.scaling_env_options['input'] = INPUTS['SINE_CURVE']
-
+    env = gym.make('ScalingSineCurve-v0')
     play(env, model, 1000)
-
     env.close()
 
 
@@ -51,19 +44,23 @@ def play(env, model, frames):
     print("Running trained model")
     obs = env.reset()
     state = model.initial_state if hasattr(model, 'initial_state') else None
-    dones = np.zeros((1,))
+    # the model was built for NUM_ENVS observations per step, the single one is repeated
+    dones = np.zeros((NUM_ENVS,))
     while frames > 0:
         frames = frames - 1
+        batch = np.repeat(np.asarray(obs)[None], NUM_ENVS, axis=0)
         if state is not None:
-            actions, _, state, _ = model.step(obs, S=state, M=dones)
+            actions, _, state, _ = model.step(batch, S=state, M=dones)
         else:
-            actions, _, _, _ = model.step(obs)
+            actions, _, _, _ = model.step(batch)
 
         obs, _, done, _ = env.step(actions[0])
         env.render()
-        done = done.any() if isinstance(done, np.ndarray) else done
         if done:
             obs = env.reset()
+            dones[:] = 1.0
+        else:
+            dones[:] = 0.0
 
 
 if __name__ == '__main__':